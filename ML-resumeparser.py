@@ -1,86 +1,36 @@
-import fitz  # PyMuPDF
 import re
-import spacy
-import nltk
-import phonenumbers
+import collections
 import pandas as pd
 import os
 import json
 import datetime
-
-from nltk.corpus import wordnet
-
-# Download the NLTK wordnet data (if not already downloaded)
-nltk.download('wordnet')
-nlp = spacy.load("en_core_web_sm")
-
-def pdf_to_text(pdf_path, output_directory):
-    pdf_document = fitz.open(pdf_path)
-    full_text = ""
-    for page in pdf_document:
-        full_text += page.get_text()
-    pdf_document.close()
-
-    # Handle and remove special characters
-    full_text = full_text.replace("\u2022", " ")  # Bullet
-    full_text = full_text.replace("\u25cf", " ")  # Black Circle
-    full_text = full_text.replace("\u25cb", " ")  # White Circle
-    full_text = full_text.replace('\u2019', "'")  # Apostrophe
-    full_text = full_text.replace('\u2013', '-')  # Hyphen or Dash
-    full_text = full_text.replace('\ufffd', '')   # Unknown special character
-
-    # Generate the output .txt file name based on the PDF file name
-    txt_file_name = os.path.splitext(os.path.basename(pdf_path))[0] + ".txt"
-
-    # Save the extracted text to a new .txt file in the specified output directory
-    txt_file_path = os.path.join(output_directory, txt_file_name)
-    with open(txt_file_path, 'w', encoding='utf-8') as f:
-        f.write(full_text)
-        print(f"Writing txt file for {txt_file_name}")
-
-    return txt_file_path
-
-
-def extract_name(doc):
-    for ent in doc.ents:
-        if ent.label_ == "PERSON":
-            return ent.text.strip()
-    return "Unknown"  # Return Unknown if no name is found
-
-def extract_email(text):
-    email_match = re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
-    if email_match:
-        return email_match.group()
-    return ""
-
-def extract_linkedin_url(text):
-    # Regular expression pattern to extract LinkedIn URLs
-    linkedin_pattern = r'https?://(?:www\.)?linkedin\.com/[\w\-/]+'
-    match = re.search(linkedin_pattern, text)
-    return match.group(0) if match else ""
-
-def extract_github_url(text):
-    # Regular expression pattern to extract GitHub URLs
-    github_pattern = r'https?://(?:www\.)?github\.com/[\w\-]+'
-    match = re.search(github_pattern, text)
-    return match.group(0) if match else ""
-
-def extract_phone_number(text):
-    for match in phonenumbers.PhoneNumberMatcher(text, "US"):
-        phone_number = phonenumbers.format_number(match.number, phonenumbers.PhoneNumberFormat.E164)
-        if phone_number:
-            return phone_number
-    return ""
-
-def extract_dates_from_regex(text):
-    # Extract dates with formats like "2022 - Present", "2021 - 2023", "2021 - Now"
-    return re.findall(r'\d{4} - (?:\d{4}|Present|Now)', text, re.I)
-
-def extract_dates_from_spacy(doc):
-    dates = []
-    
-    # Pattern to match various date formats
-    date_pattern = re.compile(r'''
+import bisect
+import multiprocessing
+import multiprocessing.util
+import functools
+import hashlib
+
+from nlp_models import load_model, parse, parse_many
+import instrumentation
+from result_cache import ResultCache, content_key
+from resume_core import (
+    iter_pdf_pages,
+    extract_name,
+    extract_contacts,
+    first_contacts,
+    DEFAULT_REGION,
+)
+from sinks import TextFileSink, CorpusSink, JsonlSink, ParquetSink, atomic_open, rebuild_corpus
+from ingest_manifest import IngestManifest, watch_directory
+
+# Bump whenever text extraction or parsing changes, so cached results from older versions are not reused.
+# Cache keys use pipeline_version(), which also changes with the heading synonyms file.
+PIPELINE_VERSION = "5"
+
+# Date patterns, compiled once at import
+# Ranges like "2022 - Present", "2021 - 2023", "2021 - Now"
+DATE_RANGE_PATTERN = re.compile(r'\d{4} - (?:\d{4}|Present|Now)', re.I)
+DATE_PATTERN = re.compile(r'''
     (?:
         # DD/MM/YYYY or MM/DD/YYYY format
         (?:[0-2]?[0-9]|3[0-1])[/\-](?:0?[1-9]|1[0-2])[/\-]\d{4}
@@ -102,13 +52,74 @@ def extract_dates_from_spacy(doc):
         \d{4}[\-](?:0?[1-9]|1[0-2])[\-](?:[0-2]?[0-9]|3[0-1])
     )
     ''', re.VERBOSE)
+YEAR_PATTERN = re.compile(r'(?<!\d)(?:19|20)\d{2}(?!\d)')
+ONGOING_PATTERN = re.compile(r'\b(?:present|now|current|ongoing|till date|to date)\b', re.I)
 
-    for ent in doc.ents:
-        # Check if the entity is a date or a valid formatted cardinal
-        if ent.label_ == "DATE" or (ent.label_ == "CARDINAL" and date_pattern.match(ent.text.strip())):
-            dates.append(ent.text.strip())
-    return dates
+def extract_dates_from_regex(text):
+    # Extract dates with formats like "2022 - Present", "2021 - 2023", "2021 - Now"
+    return DATE_RANGE_PATTERN.findall(text)
 
+def _is_date_entity(ent):
+    # Check if the entity is a date or a valid formatted cardinal
+    return ent.label_ == "DATE" or (ent.label_ == "CARDINAL" and DATE_PATTERN.match(ent.text.strip()))
+
+def extract_dates_from_spacy(doc):
+    return [ent.text.strip() for ent in doc.ents if _is_date_entity(ent)]
+
+DateSpan = collections.namedtuple('DateSpan', ['start', 'end', 'text', 'start_year', 'end_year'])
+
+class DateIndex:
+    """The dates of one document as sorted, non-overlapping spans, looked up by character offset.
+
+    The regex date formats are found once over the whole text; spaCy DATE entities are added
+    from any parse of the text or a part of it, with the part's offset. Overlapping spans, such
+    as a regex range and the same range found by spaCy, are merged.
+    """
+
+    def __init__(self, text, doc=None):
+        self.text = text
+        self._starts = []
+        self._ends = []
+        spans = [match.span() for match in DATE_RANGE_PATTERN.finditer(text)]
+        spans += [match.span() for match in DATE_PATTERN.finditer(text)]
+        self.add_spans(spans)
+        if doc is not None:
+            self.add_entities(doc)
+
+    def add_spans(self, spans):
+        merged = []
+        for start, end in sorted(list(zip(self._starts, self._ends)) + list(spans)):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self._starts = [start for start, _ in merged]
+        self._ends = [end for _, end in merged]
+
+    def add_entities(self, doc, offset=0):
+        """Adds the date entities of a parse of text[offset:offset + len(doc.text)]."""
+        self.add_spans([(offset + ent.start_char, offset + ent.end_char) for ent in doc.ents if _is_date_entity(ent)])
+
+    def dates_in(self, start, end):
+        """Returns the DateSpans overlapping text[start:end], in order."""
+        first = bisect.bisect_right(self._ends, start)
+        last = bisect.bisect_left(self._starts, end)
+        dates = []
+        for span_start, span_end in zip(self._starts[first:last], self._ends[first:last]):
+            span_text = self.text[span_start:span_end].strip()
+            dates.append(DateSpan(span_start, span_end, span_text, *extract_start_end_years(span_text)))
+        return dates
+
+    def has_date(self, start, end):
+        return bisect.bisect_right(self._ends, start) < bisect.bisect_left(self._starts, end)
+
+def years_of(dates, fallback_text=''):
+    """Returns (start year, end year) covered by DateSpans, or read from fallback_text without any."""
+    start_years = [date.start_year for date in dates if date.start_year]
+    end_years = [date.end_year for date in dates if date.end_year]
+    if not start_years:
+        return extract_start_end_years(fallback_text)
+    return min(start_years), max(end_years) if end_years else None
 
 def extract_section_items(text, section_name):
     section_header = rf"\b{section_name}\b"
@@ -122,60 +133,172 @@ def search_for_section(page_text, section_name, section_synonyms):
     return []
 
 def extract_start_end_years(years_range):
-    if 'Present' in years_range:
-        end_year = datetime.datetime.now().year
-    else:
-        end_year = None
-
-    year_parts = re.findall(r'(\d{4}|\d{2}-\d{4})', years_range)
-    
-    start_year = int(year_parts[0].split('-')[0]) if year_parts else None
-    if not end_year:
-        end_year = int(year_parts[0].split('-')[-1]) if year_parts else None
-
-    return start_year, end_year
-
-def divide_into_sections(text):
-    sections = {}
-    
-    # Each main section has its possible variations
-    section_variations = {
-        "Skills": ["Skills", "Technical Skills", "Key Skills"],
-        "Education": ["Education", "Educational Background", "Academic Qualifications", "Academic details"],
-        "Work Experience": ["Work Experience", "Experience", "Professional Experience", "Employment History"],
-        "Projects": ["Projects", "Key Projects"],
-        "Certifications":["Certifications"],
-        "Extra":["Extracurricular", "Leadership", "Leadership roles and responsibilities", "Additional responsibilities", "Interests", "Hobbies", "Interests and Hobbies"]
-    }
-
-    text_lower = text.lower()
-    section_indexes = []
-
-    # Search for each variation and record the earliest index
+    """Returns (start year, end year) of a date or date range, the current year for ongoing ones.
+
+    A single date gives the same start and end year; text without a year gives (None, None).
+    """
+    years = [int(year) for year in YEAR_PATTERN.findall(years_range)]
+    if not years:
+        return None, None
+    if ONGOING_PATTERN.search(years_range):
+        return years[0], datetime.datetime.now().year
+    return years[0], years[-1]
+
+# Each main section has its possible variations
+SECTION_VARIATIONS = {
+    "Skills": ["Skills", "Technical Skills", "Key Skills"],
+    "Education": ["Education", "Educational Background", "Academic Qualifications", "Academic details"],
+    "Work Experience": ["Work Experience", "Experience", "Professional Experience", "Employment History"],
+    "Projects": ["Projects", "Key Projects"],
+    "Certifications":["Certifications"],
+    "Extra":["Extracurricular", "Leadership", "Leadership roles and responsibilities", "Additional responsibilities", "Interests", "Hobbies", "Interests and Hobbies"]
+}
+
+# Optional JSON file of extra heading synonyms, {"Main Title": ["synonym", ...]}, merged into SECTION_VARIATIONS
+SECTION_SYNONYMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'section_synonyms.json')
+
+def load_section_variations(path, base_variations=SECTION_VARIATIONS):
+    """Returns base_variations merged with the heading synonyms in the JSON file at path."""
+    with open(path, 'r', encoding='utf-8') as f:
+        extra_variations = json.load(f)
+
+    variations = {main_title: list(headings) for main_title, headings in base_variations.items()}
+    for main_title, headings in extra_variations.items():
+        known = {heading.lower() for heading in variations.setdefault(main_title, [])}
+        for heading in headings:
+            if heading.lower() not in known:
+                known.add(heading.lower())
+                variations[main_title].append(heading)
+    return variations
+
+def _normalize_heading(heading):
+    return " ".join(heading.lower().split())
+
+def _trie_pattern(headings):
+    # Build the alternation from a character trie so that headings sharing a prefix are only
+    # tried once per position, keeping the match cost flat as the synonym list grows
+    trie = {}
+    for heading in headings:
+        node = trie
+        for char in heading:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def to_pattern(node):
+        branches = []
+        for char, child in sorted(node.items()):
+            if char:
+                char_pattern = r'[ \t]+' if char == ' ' else re.escape(char)
+                branches.append(char_pattern + to_pattern(child))
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            # Greedy optional group, so the longest heading is preferred
+            pattern = '(?:' + pattern + ')?'
+        return pattern
+
+    return to_pattern(trie)
+
+def build_section_matcher(section_variations=SECTION_VARIATIONS, line_anchored=True):
+    """Compiles every heading variation into a single regex.
+
+    Returns (pattern, lookup) where lookup maps a normalized heading to its main title. With
+    line_anchored the heading must be alone on its line (an optional trailing colon is allowed),
+    otherwise it may appear anywhere between word boundaries.
+    """
+    lookup = {}
     for main_title, variations in section_variations.items():
         for variation in variations:
-            idx = text_lower.find(variation.lower())
-            if idx != -1:
-                section_indexes.append((main_title, idx))
-
-    # If no sections are found, return an empty dictionary
-    if not section_indexes:
-        return {}
+            lookup.setdefault(_normalize_heading(variation), main_title)
 
-    # Sort the section titles based on their order in the text
-    sorted_sections = sorted(section_indexes, key=lambda x: x[1])
-
-    # Slice the text to extract each section
+    headings = _trie_pattern(lookup)
+    if line_anchored:
+        pattern = re.compile(rf'^[ \t]*({headings})[ \t]*:?[ \t]*$', re.IGNORECASE | re.MULTILINE)
+    else:
+        pattern = re.compile(rf'\b({headings})\b', re.IGNORECASE)
+    return pattern, lookup
+
+_section_variations = None
+
+def get_section_variations():
+    """Returns (variations, synonyms version) for SECTION_VARIATIONS plus any synonyms in SECTION_SYNONYMS_FILE.
+
+    The file is read once per process. The version is a hash of its contents, "none" without it.
+    """
+    global _section_variations
+    if _section_variations is None:
+        if os.path.exists(SECTION_SYNONYMS_FILE):
+            with open(SECTION_SYNONYMS_FILE, 'rb') as f:
+                synonyms_version = hashlib.sha256(f.read()).hexdigest()[:16]
+            _section_variations = (load_section_variations(SECTION_SYNONYMS_FILE), synonyms_version)
+        else:
+            _section_variations = (SECTION_VARIATIONS, "none")
+    return _section_variations
+
+def pipeline_version():
+    """Returns the version cached results are keyed by: PIPELINE_VERSION and the heading synonyms in use."""
+    return f"{PIPELINE_VERSION}/synonyms-{get_section_variations()[1]}"
+
+_section_matchers = {}
+
+def get_section_matcher(line_anchored=True):
+    """Returns the cached matcher for the variations of get_section_variations."""
+    if line_anchored not in _section_matchers:
+        _section_matchers[line_anchored] = build_section_matcher(get_section_variations()[0], line_anchored)
+    return _section_matchers[line_anchored]
+
+def find_section_headings(text, section_matcher):
+    """Returns (main title, start index) for every heading in text, found in one pass."""
+    pattern, lookup = section_matcher
+    return [(lookup[_normalize_heading(match.group(1))], match.start(1)) for match in pattern.finditer(text)]
+
+def find_headings(text, section_matcher=None):
+    """Returns (main title, start index) of the section headings in text, in order.
+
+    Without a section_matcher, headings alone on their line are used, falling back to headings
+    inside lines for PDFs whose headings are not on lines of their own.
+    """
+    if section_matcher is not None:
+        return find_section_headings(text, section_matcher)
+    headings = find_section_headings(text, get_section_matcher(line_anchored=True))
+    if not headings:
+        headings = find_section_headings(text, get_section_matcher(line_anchored=False))
+    return headings
+
+def find_section_spans(text, section_matcher=None, headings=None):
+    """Returns (main title, start, end) of the content of each section, in order.
+
+    headings are the (main title, start index) of find_headings, for callers that already have
+    them. The content of a section starts on the line after its heading and ends at the next
+    heading, without surrounding whitespace, so text[start:end] is the section's text.
+    """
+    sorted_sections = headings if headings is not None else find_headings(text, section_matcher)
+
+    spans = []
     for i in range(len(sorted_sections)):
         main_title, start_index = sorted_sections[i]
         
         # Move start index to the next line after the heading
         next_line_start = text.find('\n', start_index) + 1
-        if next_line_start != -1:  # If there's a new line after the heading
-            start_index = next_line_start
+        start_index = next_line_start if next_line_start else len(text)
 
         end_index = sorted_sections[i + 1][1] if i + 1 < len(sorted_sections) else len(text)
-        section_content = text[start_index:end_index].strip()
+        # Trim surrounding whitespace by moving the offsets rather than copying the text
+        while start_index < end_index and text[start_index].isspace():
+            start_index += 1
+        while end_index > start_index and text[end_index - 1].isspace():
+            end_index -= 1
+        spans.append((main_title, start_index, end_index))
+    return spans
+
+def divide_into_sections(text, section_matcher=None, headings=None):
+    # headings are the (main title, start index) of find_headings, for callers that already have them
+    sections = {}
+
+    # Slice the text to extract each section, an empty dictionary if no sections are found
+    for main_title, start_index, end_index in find_section_spans(text, section_matcher, headings):
+        section_content = text[start_index:end_index]
 
         # Check if the section already exists in the dictionary, if so append, otherwise set
         if main_title in sections:
@@ -194,35 +317,95 @@ def contains_verb(doc):
     """Checks if the spaCy parsed document contains a verb."""
     return any(token.pos_ == "VERB" for token in doc)
 
-def extract_work_experience_section(text):
+# How extract_work_experience_section runs spaCy over the lines of a section:
+#   per_line - one nlp() call per line (original behaviour, slowest)
+#   pipe     - all lines batched through nlp.pipe, identical results to per_line
+#   single   - reuse the parse of the whole section, mapped back to lines by offset
+WORK_EXPERIENCE_PARSE_MODES = ("per_line", "pipe", "single")
+
+def split_lines_with_offsets(text):
+    """Returns the non-empty stripped lines of text with their (start, end) character offsets."""
+    lines = []
+    offset = 0
+    for line in text.split('\n'):
+        stripped = line.strip()
+        if stripped:
+            start = offset + len(line) - len(line.lstrip())
+            lines.append((stripped, start, start + len(stripped)))
+        offset += len(line) + 1
+    return lines
+
+def _annotate_lines_from_doc(doc, lines):
+    # Assign entities and verbs of the section-wide parse to the line they start on
+    line_starts = [start for _, start, _ in lines]
+    annotations = [(set(), False) for _ in lines]
+
+    def line_index(char_offset):
+        i = bisect.bisect_right(line_starts, char_offset) - 1
+        if i >= 0 and char_offset < lines[i][2]:
+            return i
+        return None
+
+    for ent in doc.ents:
+        i = line_index(ent.start_char)
+        if i is not None:
+            annotations[i][0].add(ent.label_)
+    for token in doc:
+        if token.pos_ == "VERB":
+            i = line_index(token.idx)
+            if i is not None:
+                annotations[i] = (annotations[i][0], True)
+    return annotations
+
+def annotate_lines(doc, lines, parse_mode="pipe"):
+    """Returns (entity labels, contains verb) for each line according to parse_mode."""
+    if parse_mode == "per_line":
+        line_docs = (parse(line, "ner_pos", entity_counter="work_experience_line_entities") for line, _, _ in lines)
+    elif parse_mode == "pipe":
+        line_docs = parse_many((line for line, _, _ in lines), "ner_pos", entity_counter="work_experience_line_entities")
+    elif parse_mode == "single":
+        return _annotate_lines_from_doc(doc, lines)
+    else:
+        raise ValueError(f"Unknown parse mode '{parse_mode}', expected one of {WORK_EXPERIENCE_PARSE_MODES}")
+    return [({ent.label_ for ent in line_doc.ents}, contains_verb(line_doc)) for line_doc in line_docs]
+
+def extract_work_experience_section(text, parse_mode="pipe", date_index=None, offset=0):
+    # date_index is the DateIndex of the whole document and offset where text starts in it,
+    # without one the dates of the section are indexed on their own
     work_experience_details = []
 
     # Extract dates from the section using both spaCy and regex
-    doc = nlp(text)
-    dates_spacy = extract_dates_from_spacy(doc)
-    dates_regex = extract_dates_from_regex(text)
-    dates = list(set(dates_spacy + dates_regex))
-
-    lines = [line for line in text.split('\n') if line.strip()]
+    # Only the single parse mode reads POS tags from the section-wide parse
+    doc = parse(text, "ner_pos" if parse_mode == "single" else "ner", entity_counter="work_experience_entities")
+    if date_index is None:
+        date_index, offset = DateIndex(text), 0
+    date_index.add_entities(doc, offset)
+
+    lines_with_offsets = split_lines_with_offsets(text)
+    annotations = annotate_lines(doc, lines_with_offsets, parse_mode)
+    lines = [line for line, _, _ in lines_with_offsets]
     i = 0
 
     while i < len(lines):
         company_name, job_title, date_worked, additional_details = '', '', '', []
+        years_worked = (None, None)
         parsed_categories = set()
 
         while i < len(lines) and len(parsed_categories) < 3:  # Continue until we've found all three categories
-            line = lines[i].strip()
-            doc_line = nlp(line)
+            line = lines[i]
+            _, line_start, line_end = lines_with_offsets[i]
+            entity_labels, has_verb = annotations[i]
 
             # Check for organization label, but ensure it's not a sentence
-            if 'ORG' not in parsed_categories and any(ent.label_ == "ORG" for ent in doc_line.ents) and not contains_verb(doc_line):
+            if 'ORG' not in parsed_categories and 'ORG' in entity_labels and not has_verb:
                 company_name = line
                 parsed_categories.add('ORG')
             elif 'TITLE' not in parsed_categories and is_job_title(line):
                 job_title = line
                 parsed_categories.add('TITLE')
-            elif 'DATE' not in parsed_categories and (any(ent.label_ == "DATE" for ent in doc_line.ents) or any(date in line for date in dates)):
+            elif 'DATE' not in parsed_categories and ('DATE' in entity_labels or date_index.has_date(offset + line_start, offset + line_end)):
                 date_worked = line
+                years_worked = years_of(date_index.dates_in(offset + line_start, offset + line_end), line)
                 parsed_categories.add('DATE')
             else:
                 additional_details.append(line)
@@ -234,70 +417,155 @@ def extract_work_experience_section(text):
                 'company_name': company_name,
                 'job_title': job_title,
                 'dates_worked': date_worked,
+                'start_year': years_worked[0],
+                'end_year': years_worked[1],
                 'additional_info': additional_details
             })
 
     return work_experience_details
 
 
-def extract_education_section(text):
+# Education patterns, compiled once at import
+# The keyword must follow a name character and be followed by a separator, as in the original
+# lazy pattern r"((?:[\w\s'’]+?(?: University| College| Institute| Institution))(?=[\s,;]|\n))"
+UNIVERSITY_KEYWORD_PATTERN = re.compile(r"(?<=[\w\s'’]) (?:University|College|Institute|Institution)(?=[\s,;])")
+# Characters that cannot be part of a university name
+NON_NAME_CHARACTER_PATTERN = re.compile(r"[^\w\s'’]")
+COURSE_NAME_PATTERN = re.compile(r'(?i)(bachelors|b\.?a|b\.?sc|b\.?e|b\.?tech|masters|m\.?a|m\.?sc|m\.?e|m\.?tech|ph\.?d)[\w\s.&]+')
+MARKS_PATTERN = re.compile(r'(\d{1,2}\.\d{1,2}/\d{1,2}|\d{1,2}%|Pass with [\w\s]+)')
+BULLET_SPLIT_PATTERN = re.compile(r'\s*\u25cb\s*|\s*\u25cf\s*')
+
+# Longer education sections are cut, no resume has one this long. With the linear
+# split_universities this bounds the work, and the NER parse, of a pathological section
+EDUCATION_MAX_CHARACTERS = 50000
+
+def split_universities(text):
+    """Returns (university name, text up to the next university) pairs, in one linear pass.
+
+    Gives the same pairs as re.split with the original lazy university pattern, [1:] and taken
+    two at a time, without its backtracking: a name is the run of name characters before a
+    keyword, starting after the previous match.
+    """
+    non_name_positions = [match.start() for match in NON_NAME_CHARACTER_PATTERN.finditer(text)]
+    universities = []
+    position = 0
+    for keyword in UNIVERSITY_KEYWORD_PATTERN.finditer(text):
+        keyword_start = keyword.start()
+        if keyword_start - 1 < position:
+            # No name character left between the previous match and this keyword
+            continue
+        # The name starts after the last non-name character before the keyword
+        index = bisect.bisect_left(non_name_positions, keyword_start) - 1
+        name_start = max(position, non_name_positions[index] + 1 if index >= 0 else 0)
+        universities.append((name_start, keyword.end()))
+        position = keyword.end()
+
+    return [
+        (text[start:end], text[end:universities[i + 1][0] if i + 1 < len(universities) else len(text)])
+        for i, (start, end) in enumerate(universities)
+    ]
+
+def extract_education_section(text, date_index=None, offset=0):
+    # date_index and offset as for extract_work_experience_section
     education_details = []
     
-    education_section_text = text
-    doc = nlp(education_section_text)
-    dates = extract_dates_from_spacy(doc)
-    
-    university_pattern = r"((?:[\w\s'’]+?(?: University| College| Institute| Institution))(?=[\s,;]|\n))"
-    university_matches = re.split(university_pattern, education_section_text)[1:]
-
-    for i in range(0, len(university_matches), 2):
-        uni_name = university_matches[i].strip()
-        uni_section = university_matches[i+1].strip()
-
-        course_name_pattern = r'(?i)(bachelors|b\.?a|b\.?sc|b\.?e|b\.?tech|masters|m\.?a|m\.?sc|m\.?e|m\.?tech|ph\.?d)[\w\s.&]+'
-        course_match = re.search(course_name_pattern, uni_section)
+    education_section_text = text[:EDUCATION_MAX_CHARACTERS]
+    doc = parse(education_section_text, "ner", entity_counter="education_entities")
+    if date_index is None:
+        date_index, offset = DateIndex(education_section_text), 0
+    date_index.add_entities(doc, offset)
+    dates = date_index.dates_in(offset, offset + len(education_section_text))
+
+    for uni_name, uni_section in split_universities(education_section_text):
+        uni_name = uni_name.strip()
+        uni_section = uni_section.strip()
+
+        course_match = COURSE_NAME_PATTERN.search(uni_section)
         course_name = course_match.group().strip() if course_match else ''
         uni_section = uni_section.replace(course_name, "", 1).strip()
 
-        marks_pattern = r'(\d{1,2}\.\d{1,2}/\d{1,2}|\d{1,2}%|Pass with [\w\s]+)'
-        marks_match = re.search(marks_pattern, uni_section)
+        marks_match = MARKS_PATTERN.search(uni_section)
         marks = marks_match.group().strip() if marks_match else ''
 
-        additional_details = [info for info in re.split(r'\s*\u25cb\s*|\s*\u25cf\s*', uni_section) if info and not info.startswith(('Github', 'LinkedIn'))]
+        additional_details = [info for info in BULLET_SPLIT_PATTERN.split(uni_section) if info and not info.startswith(('Github', 'LinkedIn'))]
 
-        date_attended = dates.pop(0) if dates else ''
+        date_attended = dates.pop(0) if dates else None
 
         education_details.append({
             'university_name': uni_name,
             'course_name': course_name,
-            'dates_attended': date_attended,
+            'dates_attended': date_attended.text if date_attended else '',
+            'start_year': date_attended.start_year if date_attended else None,
+            'end_year': date_attended.end_year if date_attended else None,
             'marks_or_percentage': marks,
             'additional_info': additional_details
         })
 
     return education_details
 
-def extract_details_from_text(text):
-
-    name = extract_name(nlp(text))
-    email = extract_email(text)
+def extract_personal_info(text, doc=None, region=DEFAULT_REGION):
+    """Returns the name and contact details of a resume, without parsing any of its sections."""
+    if doc is None:
+        with instrumentation.stage("spacy_ner"):
+            doc = parse(text, "ner")
+    with instrumentation.stage("extract_name"):
+        name = extract_name(doc)
 
-    linkedin_url = extract_linkedin_url(text)
-    github_url = extract_github_url(text)
+    # Email, URLs and phone numbers come from a single scan of the text
+    with instrumentation.stage("extract_contacts"):
+        contacts = first_contacts(extract_contacts(text, region))
 
-    phone = extract_phone_number(text)
-
-    sections = divide_into_sections(text)
+    return {
+        'name': name,
+        'email': contacts['email'],
+        'phone': contacts['phone'],
+        'linkedin': contacts['linkedin'],
+        'github': contacts['github'],
+    }
 
-    if 'Education' in sections:
-        education_text = sections["Education"]
-        education_details = extract_education_section(education_text)
+def extract_details_from_text(text, doc=None, region=DEFAULT_REGION, headings=None):
+    """Returns the structured details of a resume's text, see extract_details_and_sections."""
+    return extract_details_and_sections(text, doc, region, headings)[0]
+
+def extract_details_and_sections(text, doc=None, region=DEFAULT_REGION, headings=None):
+    # Returns (details, sections), sections being the divide_into_sections of the text
+    # doc is an optional NER parse of the whole text, for callers that already have one
+    # region is the phone number region assumed for numbers without a country code
+    # headings are the section headings of find_headings, for callers that already have them
+
+    if doc is None:
+        with instrumentation.stage("spacy_ner"):
+            doc = parse(text, "ner")
+    personal_info = extract_personal_info(text, doc, region)
+
+    with instrumentation.stage("sectioning"):
+        if headings is None:
+            headings = find_headings(text)
+        section_spans = find_section_spans(text, headings=headings)
+        sections = divide_into_sections(text, headings=headings)
+
+    # Dates are indexed once for the whole text and looked up by offset in every section
+    with instrumentation.stage("date_index"):
+        date_index = DateIndex(text, doc)
+
+    # A section that appears more than once is extracted from each of its spans
+    education_spans = [(start, end) for main_title, start, end in section_spans if main_title == 'Education']
+    if education_spans:
+        with instrumentation.stage("extract_education_section"):
+            education_details = [
+                entry for start, end in education_spans
+                for entry in extract_education_section(text[start:end], date_index, start)
+            ]
     else:
         education_details = None
         
-    if 'Work Experience' in sections:
-        work_experience_text = sections["Work Experience"]
-        work_experience_details = extract_work_experience_section(work_experience_text)
+    work_experience_spans = [(start, end) for main_title, start, end in section_spans if main_title == 'Work Experience']
+    if work_experience_spans:
+        with instrumentation.stage("extract_work_experience_section"):
+            work_experience_details = [
+                entry for start, end in work_experience_spans
+                for entry in extract_work_experience_section(text[start:end], date_index=date_index, offset=start)
+            ]
     else:
         work_experience_details = None
 
@@ -323,31 +591,132 @@ def extract_details_from_text(text):
 
 
     details = {
-        'name': name,
-        'email': email,
-        'phone': phone,
+        'name': personal_info['name'],
+        'email': personal_info['email'],
+        'phone': personal_info['phone'],
         'education': education_details,
         'work_experience': work_experience_details,
-        'linkedin': linkedin_url,
-        'github': github_url,
+        'linkedin': personal_info['linkedin'],
+        'github': personal_info['github'],
         'projects': projects_text,
         'certifications': certifications_text,
         'extra': extra_text,
         'skills': skills_text,
     }
-    return details
+    return details, sections
 
 
 def save_details_to_csv(details, output_file, output_directory):
     df = pd.DataFrame([details])
     output_file_path = os.path.join(output_directory, output_file)
-    df.to_csv(output_file_path, index=False)
+    with atomic_open(output_file_path, 'w', encoding='utf-8', newline='') as f:
+        df.to_csv(f, index=False)
 
 def save_details_to_json(details, output_file, output_directory):
     output_file_path = os.path.join(output_directory, output_file)
-    with open(output_file_path, 'w', encoding='utf-8') as f:
+    with atomic_open(output_file_path, 'w', encoding='utf-8') as f:
         json.dump(details, f, indent=4)
 
+def extract_details_from_pages(pages, region=DEFAULT_REGION, name_pages=1, personal_only=False):
+    """Returns (text, details) for an iterable of page texts, working on pages as they arrive.
+
+    The name is read from an NER parse of the first name_pages pages rather than of the whole
+    text, and headings alone on their line are found page by page. Pages are taken in turn in
+    this thread, so reading a page waits for the work on the previous one; they only overlap
+    when iter_pdf_pages reads ahead in page worker processes. With personal_only, details is
+    the extract_personal_info of the text and no sections are parsed.
+    """
+    page_texts, headings, doc = [], [], None
+    offset = 0
+    for page in pages:
+        if not personal_only:
+            with instrumentation.stage("sectioning"):
+                headings.extend((title, offset + start) for title, start in find_section_headings(page, get_section_matcher(line_anchored=True)))
+        page_texts.append(page)
+        offset += len(page)
+        if len(page_texts) == name_pages:
+            with instrumentation.stage("spacy_ner"):
+                doc = parse("".join(page_texts), "ner")
+
+    text = "".join(page_texts)
+    if personal_only:
+        return text, extract_personal_info(text, doc, region)
+    # Without headings on their own lines, extract_details_from_text falls back to headings inside lines
+    return text, extract_details_from_text(text, doc, region, headings or None)
+
+def parse_pdf(pdf_path, cache=None, layout="text", max_pages=None, page_workers=1):
+    """In-memory pipeline: returns (text, details) for a PDF without writing any intermediate files.
+
+    Pages are streamed from resume_core.iter_pdf_pages into extract_details_from_pages, see
+    there for layout, max_pages and page_workers. With a ResultCache, PDFs whose bytes were
+    already parsed by this pipeline_version() and these settings are served from the cache.
+    """
+    if cache is None:
+        return extract_details_from_pages(iter_pdf_pages(pdf_path, None, layout, max_pages, page_workers))
+
+    with open(pdf_path, 'rb') as f:
+        pdf_bytes = f.read()
+    key = content_key(pdf_bytes, f"{pipeline_version()}/{layout}/{max_pages}")
+    cached = cache.get(key)
+    if cached is not None:
+        instrumentation.count("cache_hits")
+        return cached['text'], cached['details']
+
+    pdf_text, details = extract_details_from_pages(iter_pdf_pages(pdf_path, pdf_bytes, layout, max_pages, page_workers))
+    cache.put(key, {'text': pdf_text, 'details': details})
+    return pdf_text, details
+
+def process_pdf(pdf_path, cache=None, layout="text", max_pages=None, page_workers=1):
+    """Parses one PDF, returning (text, details, error, stats) so a bad file cannot stop a batch.
+
+    stats is the instrumentation.DocumentStats with the stage timings and counters of the PDF.
+    """
+    with instrumentation.track_document(os.path.basename(pdf_path)) as stats:
+        try:
+            return parse_pdf(pdf_path, cache, layout, max_pages, page_workers) + (None, stats)
+        except Exception as e:
+            stats.counters["errors"] += 1
+            return None, None, f"{type(e).__name__}: {e}", stats
+
+_worker_cache = None
+
+def _init_pdf_worker(cache_path, cache_max_bytes):
+    # Each worker loads the spaCy model and opens its cache once when it starts, rather than
+    # receiving a pickled cache that reconnects for every PDF
+    global _worker_cache
+    load_model()
+    if cache_path:
+        _worker_cache = ResultCache(cache_path, cache_max_bytes)
+        # Writes the access times of the worker's hits and closes it when the worker exits
+        multiprocessing.util.Finalize(_worker_cache, _worker_cache.close, exitpriority=10)
+
+def _process_pdf_in_worker(pdf_path, layout, max_pages):
+    return process_pdf(pdf_path, _worker_cache, layout, max_pages)
+
+def process_pdfs(pdf_paths, workers=1, cache=None, layout="text", max_pages=None, page_workers=1):
+    """Yields (pdf_path, text, details, error, stats) for each PDF, in the order of pdf_paths.
+
+    With workers > 1 the PDFs are handed out one at a time from the pool's task queue to
+    separate processes, each with its own copy of the spaCy model. page_workers processes read
+    the pages of each PDF only when workers is 1, pool workers cannot start pools of their own.
+    """
+    if workers <= 1:
+        worker = functools.partial(process_pdf, cache=cache, layout=layout, max_pages=max_pages, page_workers=page_workers)
+        for pdf_path in pdf_paths:
+            yield (pdf_path,) + worker(pdf_path)
+        return
+
+    worker = functools.partial(_process_pdf_in_worker, layout=layout, max_pages=max_pages)
+    cache_args = (cache.path, cache.max_bytes) if cache else (None, None)
+
+    with multiprocessing.Pool(workers, initializer=_init_pdf_worker, initargs=cache_args) as pool:
+        # imap keeps results in input order while workers run ahead on the queue
+        for pdf_path, result in zip(pdf_paths, pool.imap(worker, pdf_paths, chunksize=1)):
+            yield (pdf_path,) + result
+        # Let the workers exit on their own rather than be terminated, so their caches are closed
+        pool.close()
+        pool.join()
+
 def main():
     '''
     input_directory = '/Users/sarjhana/Projects/Campuzzz/Testing'  # Specify the directory containing the PDF files
@@ -360,47 +729,136 @@ def main():
     output_directory_txt = '/Users/sarjhana/Projects/Campuzzz/CV-text-files'  # Specify the desired output directory for text files
     output_directory_csv = '/Users/sarjhana/Projects/Campuzzz/CV-processed-csv-files'  # Specify the desired output directory for CSV files
     output_directory_json = '/Users/sarjhana/Projects/Campuzzz/CV-processed-json-files' # Specify the desired output directory for JSON files
-
-
-    # Create a single text file to store all the converted text
-    all_text_file = '/Users/sarjhana/Projects/Campuzzz/all_resumes_text.txt'
-    with open(all_text_file, 'w', encoding='utf-8') as f:
-        pass  # Create an empty file
-
-    # Get a list of all PDF files in the input directory
-    pdf_files = [file for file in os.listdir(input_directory) if file.endswith('.pdf')]
-
-    # Initialize a counter variable to keep track of the file number
-    file_count = 0
-
-    for pdf_file in pdf_files:
-        file_count += 1
-        print(f"Processing File {file_count}/{len(pdf_files)} - {pdf_file}")
-
-        # Construct the full path of the PDF file
-        pdf_path = os.path.join(input_directory, pdf_file)
-
-        # Convert the PDF to text and save it as a .txt file
-        txt_file_path = pdf_to_text(pdf_path, output_directory_txt)
-
-        # Read the content of the text file
-        with open(txt_file_path, 'r', encoding='utf-8') as f:
-            pdf_text = f.read()
-            with open(all_text_file, 'a', encoding='utf-8') as f:
-                f.write(pdf_text + "\n")
-
-        with open(txt_file_path, 'r', encoding='utf-8') as f:
-            pdf_text = f.read()
-        
-        resume_details = extract_details_from_text(pdf_text)
-
-        # Save the details to a CSV file
-        output_file = os.path.splitext(pdf_file)[0] + '_details.csv'
-        save_details_to_csv(resume_details, output_file, output_directory_csv)
-
-        # Save the details to a JSON file
-        output_file = os.path.splitext(pdf_file)[0] + '_details.json'
-        save_details_to_json(resume_details, output_file, output_directory_json)
+    workers = os.cpu_count() or 1  # Number of processes used to parse PDFs, 1 parses in this process
+    page_workers = 1  # Processes reading the pages of each PDF, only used with workers = 1
+    pdf_layout = "text"  # "blocks" keeps the reading order of multi-column resumes
+    max_pages = None  # Only read the first pages of each PDF, None for all pages
+    cache_path = '/Users/sarjhana/Projects/Campuzzz/resume-parse-cache.sqlite'  # Cache of parsed PDFs for incremental re-runs, None to disable
+    write_txt_files = True  # Save each resume's text as a .txt file
+    all_text_file = '/Users/sarjhana/Projects/Campuzzz/all_resumes_text.txt'  # Single text file with all the converted text, None to skip (with manifest_path, rebuilt from the txt files when the run ends)
+    write_per_resume_files = True  # Save a CSV and a JSON file for every resume
+    output_jsonl_file = '/Users/sarjhana/Projects/Campuzzz/CV-processed-details.jsonl'  # One JSON line per resume for the whole run, None to skip
+    output_parquet_directory = None  # Parquet dataset with one row per resume (requires pyarrow), None to skip
+    instrumentation_summary_file = '/Users/sarjhana/Projects/Campuzzz/CV-processing-stats.json'  # Per-stage timings and counters of the run, None to skip
+    slow_document_seconds = 10  # Report documents that take longer than this to parse
+    manifest_path = '/Users/sarjhana/Projects/Campuzzz/CV-ingest-manifest.sqlite'  # Checkpoint of handled PDFs so a run resumes where the last one stopped, None to process every file
+    watch = False  # Keep polling input_directory and process new or changed PDFs as they arrive (requires manifest_path)
+    poll_interval = 5  # Seconds between scans of input_directory when watching
+    retry_failed = False  # Try PDFs that failed before again even if they have not changed
+    checkpoint_every = 500  # Files between manifest commits, at most this many are processed again after a crash
+    if manifest_path and all_text_file and not write_txt_files:
+        raise ValueError("With manifest_path the corpus is rebuilt from the txt files, set write_txt_files")
+
+    # Optional sinks for the extracted text, written from memory without re-reading any file
+    text_sinks = []
+    if write_txt_files:
+        text_sinks.append(TextFileSink(output_directory_txt))
+    if all_text_file and not manifest_path:
+        text_sinks.append(CorpusSink(all_text_file))
+
+    # Consolidated sinks for the parsed details of all resumes. Files since the last checkpoint are
+    # processed again after a crash, so these may hold a resume twice: dedupe on "file"
+    details_sinks = []
+    if output_jsonl_file:
+        details_sinks.append(JsonlSink(output_jsonl_file, append=manifest_path is not None))
+    if output_parquet_directory:
+        details_sinks.append(ParquetSink(output_parquet_directory, append=manifest_path is not None))
+
+    cache = ResultCache(cache_path) if cache_path else None
+    manifest = IngestManifest(manifest_path) if manifest_path else None
+
+    def report_slow_document(stats):
+        total = stats.wall_time.get("total", 0.0)
+        if total > slow_document_seconds:
+            slowest_stage = max((name for name in stats.wall_time if name != "total"), key=stats.wall_time.get, default="")
+            print(f"Slow document {stats.name}: {total:.1f}s, slowest stage {slowest_stage}")
+
+    run_stats = instrumentation.Instrumentation(hooks=[report_slow_document])
+
+    if manifest:
+        # Batches of (path, fingerprint) of the PDFs that are new or changed since they were last handled
+        batches = watch_directory(input_directory, manifest, '.pdf', watch, poll_interval, retry_failed=retry_failed)
+    else:
+        # Get a list of all PDF files in the input directory
+        pdf_files = sorted(file for file in os.listdir(input_directory) if file.endswith('.pdf'))
+        batches = [[(os.path.join(input_directory, pdf_file), None) for pdf_file in pdf_files]]
+
+    files_since_checkpoint = 0
+
+    def checkpoint():
+        # The manifest records files as done only once every sink has made their outputs durable,
+        # until then their marks stay in memory
+        nonlocal files_since_checkpoint
+        files_since_checkpoint = 0
+        if all([sink.flush() for sink in text_sinks + details_sinks]):
+            manifest.commit()
+
+    def file_handled():
+        # Done and failed files both count, so a failure never delays the next checkpoint
+        nonlocal files_since_checkpoint
+        files_since_checkpoint += 1
+        if files_since_checkpoint >= checkpoint_every:
+            checkpoint()
+
+    failed_files = []
+
+    try:
+        for batch in batches:
+            fingerprints = dict(batch)
+            for file_count, (pdf_path, pdf_text, resume_details, error, stats) in enumerate(process_pdfs(list(fingerprints), workers, cache, pdf_layout, max_pages, page_workers), start=1):
+                pdf_file = os.path.basename(pdf_path)
+                print(f"Processing File {file_count}/{len(fingerprints)} - {pdf_file}")
+                run_stats.add(stats)
+
+                if error:
+                    print(f"Failed to process {pdf_file}: {error}")
+                    failed_files.append(pdf_file)
+                    if manifest:
+                        manifest.mark_failed(pdf_path, fingerprints[pdf_path], error)
+                        file_handled()
+                    continue
+
+                for sink in text_sinks:
+                    sink.write(os.path.splitext(pdf_file)[0], pdf_text)
+
+                for sink in details_sinks:
+                    sink.write(pdf_file, resume_details)
+
+                if write_per_resume_files:
+                    # Save the details to a CSV file
+                    output_file = os.path.splitext(pdf_file)[0] + '_details.csv'
+                    save_details_to_csv(resume_details, output_file, output_directory_csv)
+
+                    # Save the details to a JSON file
+                    output_file = os.path.splitext(pdf_file)[0] + '_details.json'
+                    save_details_to_json(resume_details, output_file, output_directory_json)
+
+                if manifest:
+                    manifest.mark_done(pdf_path, fingerprints[pdf_path])
+                    file_handled()
+            if manifest:
+                checkpoint()
+    except KeyboardInterrupt:
+        if not watch:
+            raise
+    finally:
+        for sink in text_sinks + details_sinks:
+            sink.close()
+        if cache:
+            cache.close()
+        if manifest:
+            # Closed sinks have written everything
+            manifest.commit()
+            manifest.close()
+        if instrumentation_summary_file:
+            run_stats.write_summary(instrumentation_summary_file)
+
+    if manifest and all_text_file:
+        # Each resume's latest text once, however many times it was processed
+        rebuild_corpus(output_directory_txt, all_text_file)
+
+    if failed_files:
+        print(f"{len(failed_files)} file(s) could not be processed: {', '.join(failed_files)}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,281 @@
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+import phonenumbers
+
+import dataprep
+import synthetic_resumes
+from resume_core import extract_email, extract_linkedin_url, extract_github_url, extract_phone_number, pdf_to_text
+from ml_resumeparser import resume_parser as parser
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+def make_work_experience_section(num_jobs, rng):
+    lines = []
+    for _ in range(num_jobs):
+        start_year = rng.randint(2005, 2020)
+        end = rng.choice([str(start_year + rng.randint(1, 3)), "Present"])
+        lines.append(rng.choice(synthetic_resumes.COMPANIES))
+        lines.append(rng.choice(synthetic_resumes.TITLES))
+        lines.append(f"{start_year} - {end}")
+        lines.extend(rng.sample(synthetic_resumes.DETAILS[:6], rng.randint(2, 4)))
+        lines.append("")
+    return "\n".join(lines)
+
+def time_call(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+def extract_contacts(text):
+    return (
+        extract_email(text),
+        extract_linkedin_url(text),
+        extract_github_url(text),
+        extract_phone_number(text),
+    )
+
+# Each stage takes a prepared resume and returns None when the resume has nothing for it to do
+STAGES = {
+    "pdf_to_text": lambda resume: pdf_to_text(resume["pdf_path"], resume["scratch_directory"]),
+    "divide_into_sections": lambda resume: parser.divide_into_sections(resume["text"]),
+    "extract_work_experience_section": lambda resume: parser.extract_work_experience_section(resume["sections"]["Work Experience"]),
+    "extract_education_section": lambda resume: parser.extract_education_section(resume["sections"]["Education"]),
+    "contact_extractors": lambda resume: extract_contacts(resume["text"]),
+    "extract_contacts": lambda resume: parser.extract_contacts(resume["text"]),
+    "extract_details_from_text": lambda resume: parser.extract_details_from_text(resume["text"]),
+}
+
+STAGE_INPUTS = {
+    "extract_work_experience_section": "Work Experience",
+    "extract_education_section": "Education",
+}
+
+def prepare_corpus(directory, count, seed):
+    resumes = []
+    for base_path in synthetic_resumes.generate_corpus(directory, count, seed):
+        with open(base_path + ".txt", 'r', encoding='utf-8') as f:
+            text = f.read()
+        resumes.append({
+            "pdf_path": base_path + ".pdf",
+            "text": text,
+            "sections": parser.divide_into_sections(text),
+            "scratch_directory": directory,
+        })
+    return resumes
+
+def run_stage(stage, resumes):
+    section = STAGE_INPUTS.get(stage)
+    latencies = []
+    for resume in resumes:
+        if section and section not in resume["sections"]:
+            continue
+        start = time.perf_counter()
+        STAGES[stage](resume)
+        latencies.append(time.perf_counter() - start)
+    if not latencies:
+        return None
+    return {
+        "docs": len(latencies),
+        "docs_per_sec": len(latencies) / sum(latencies),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Prints the change against the baseline per stage and returns the stages that regressed."""
+    regressions = []
+    for stage, result in results.items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous:
+            continue
+        ratio = result["docs_per_sec"] / previous["docs_per_sec"]
+        status = "REGRESSION" if ratio < 1 - tolerance else "ok"
+        print(f"  {stage:<32} {ratio:6.2f}x baseline throughput  {status}")
+        if status != "ok":
+            regressions.append(stage)
+    return regressions
+
+def benchmark_stages(args):
+    # Load the model up front so the first document does not pay for it
+    parser.load_model()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Generating {args.docs} synthetic resumes (seed {args.seed})")
+        resumes = prepare_corpus(directory, args.docs, args.seed)
+
+        results = {}
+        print(f"  {'stage':<32} {'docs':>5} {'docs/sec':>10} {'p50 ms':>9} {'p99 ms':>9}")
+        for stage in args.stages or STAGES:
+            result = run_stage(stage, resumes)
+            if result is None:
+                continue
+            results[stage] = result
+            print(f"  {stage:<32} {result['docs']:>5} {result['docs_per_sec']:>10.1f} {result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({"docs": args.docs, "seed": args.seed, "stages": results}, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"Compared to baseline {args.baseline}")
+        if compare_to_baseline(results, baseline, args.tolerance):
+            sys.exit(1)
+
+def benchmark_work_experience(args):
+    rng = random.Random(args.seed)
+    sections = [make_work_experience_section(args.jobs, rng) for _ in range(args.sections)]
+
+    def run(parse_mode):
+        return [parser.extract_work_experience_section(section, parse_mode) for section in sections]
+
+    print(f"extract_work_experience_section: {args.sections} sections x {args.jobs} jobs")
+    baseline_time, baseline_result = time_call(run, "per_line")
+    for parse_mode in parser.WORK_EXPERIENCE_PARSE_MODES:
+        elapsed, result = time_call(run, parse_mode)
+        matches = "identical" if result == baseline_result else "differs"
+        print(f"  {parse_mode:<9} {elapsed:8.3f}s  {baseline_time / elapsed:5.2f}x  output {matches} from per_line")
+
+def benchmark_section_headings(args):
+    rng = random.Random(args.seed)
+    section_variations = {title: list(headings) for title, headings in parser.SECTION_VARIATIONS.items()}
+    titles = list(section_variations)
+    words = ["professional", "technical", "academic", "career", "relevant", "selected", "core", "additional", "summary", "history"]
+    while sum(len(headings) for headings in section_variations.values()) < args.synonyms:
+        title = rng.choice(titles)
+        section_variations[title].append(f"{' '.join(rng.sample(words, 2))} {title} {rng.randint(0, 10**6)}")
+
+    texts = [synthetic_resumes.generate_resume(rng, "long") for _ in range(args.docs)]
+
+    print(f"divide_into_sections: {args.docs} resumes, {args.synonyms} heading variations")
+    start = time.perf_counter()
+    section_matcher = parser.build_section_matcher(section_variations)
+    print(f"  build matcher {time.perf_counter() - start:8.3f}s")
+    elapsed, _ = time_call(lambda: [parser.divide_into_sections(text, section_matcher) for text in texts])
+    print(f"  match         {elapsed:8.3f}s  {args.docs / elapsed:8.0f} docs/sec")
+
+def legacy_clean_text(text, details):
+    # clean_text before span-based redaction, kept to measure against
+    cleaned_text = text
+    if details['name']:
+        cleaned_text = cleaned_text.replace(details['name'], '')
+    if details['email']:
+        cleaned_text = cleaned_text.replace(details['email'], '')
+    if details['phone']:
+        for match in list(phonenumbers.PhoneNumberMatcher(cleaned_text, "US")):
+            cleaned_text = cleaned_text[:match.start] + cleaned_text[match.end:]
+    if details['linkedin']:
+        cleaned_text = cleaned_text.replace(details['linkedin'], '')
+    if details['github']:
+        cleaned_text = cleaned_text.replace(details['github'], '')
+    return cleaned_text
+
+def benchmark_redaction(args):
+    details = {
+        'name': "Priya Patel",
+        'email': "priya.patel@example.com",
+        'phone': "+14155550123",
+        'linkedin': "https://www.linkedin.com/in/priyapatel",
+        'github': "https://github.com/priyapatel",
+    }
+    line = "Priya Patel | priya.patel@example.com | (415) 555-0123 | https://www.linkedin.com/in/priyapatel | https://github.com/priyapatel | led the analytics team"
+    text = "\n".join([line] * args.lines)
+
+    print(f"clean_text: {args.lines} PII-dense lines, {len(text)} characters")
+    legacy_time, _ = time_call(legacy_clean_text, text, details, repeat=1)
+    elapsed, cleaned = time_call(dataprep.clean_text, text, details)
+    leaked = [value for value in details.values() if value in cleaned]
+    print(f"  legacy      {legacy_time:8.3f}s")
+    print(f"  span-based  {elapsed:8.3f}s  {legacy_time / elapsed:6.1f}x  leaked values: {leaked or 'none'}")
+
+# The university pattern of extract_education_section before the linear-time split, kept to measure against
+LEGACY_UNIVERSITY_PATTERN = r"((?:[\w\s'’]+?(?: University| College| Institute| Institution))(?=[\s,;]|\n))"
+
+def legacy_split_universities(text):
+    matches = re.split(LEGACY_UNIVERSITY_PATTERN, text)[1:]
+    return [(matches[i], matches[i + 1]) for i in range(0, len(matches), 2)]
+
+def adversarial_education_sections(size, rng):
+    # Inputs that made the lazy pattern backtrack: long runs of name characters with no keyword,
+    # or with a keyword that fails its lookahead, and long sections with many universities
+    words = [rng.choice(synthetic_resumes.SKILLS) for _ in range(size // 3)]
+    unbroken = " ".join(words)[:size]
+    return {
+        'unbroken words': unbroken,
+        'one line, no breaks': unbroken.replace(" ", "_"),
+        'keyword without separator': (unbroken + " University")[-size:],
+        'near-miss keywords': (" Universityx " * (size // 12))[:size],
+        'many universities': ("Stanford University, BSc Computer Science 2018 - 2022 3.8/4\n" * (size // 60))[:size],
+    }
+
+def benchmark_education(args):
+    rng = random.Random(args.seed)
+    print(f"split_universities on adversarial education sections, legacy regex capped at {args.legacy_max} characters")
+    for size in args.sizes:
+        for label, text in adversarial_education_sections(size, rng).items():
+            elapsed, pairs = time_call(parser.split_universities, text)
+            line = f"  {label:28s} {size:8d} chars  linear {elapsed * 1000:9.2f}ms"
+            if size <= args.legacy_max:
+                legacy_time, legacy_pairs = time_call(legacy_split_universities, text, repeat=1)
+                line += f"  legacy {legacy_time * 1000:9.2f}ms  {legacy_time / elapsed:8.1f}x"
+                if legacy_pairs != pairs:
+                    line += "  MISMATCH"
+            print(line)
+        # The whole extractor on the last input, the section with many universities
+        elapsed, _ = time_call(parser.extract_education_section, text, repeat=1)
+        print(f"  {'extract_education_section':28s} {size:8d} chars  total  {elapsed * 1000:9.2f}ms")
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark the resume parser on synthetic resumes")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    subparsers = arg_parser.add_subparsers(dest="benchmark")
+
+    stages_parser = subparsers.add_parser("stages", help="Throughput and latency of each parsing stage (default)")
+    stages_parser.add_argument("--docs", type=int, default=200, help="Number of synthetic resumes")
+    stages_parser.add_argument("--stages", nargs="+", choices=list(STAGES), help="Only run these stages")
+    stages_parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline results file")
+    stages_parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    stages_parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed drop in docs/sec before a stage counts as a regression")
+    stages_parser.set_defaults(func=benchmark_stages)
+
+    parse_modes_parser = subparsers.add_parser("parse-modes", help="Compare the work-experience parse modes")
+    parse_modes_parser.add_argument("--sections", type=int, default=50, help="Number of synthetic sections")
+    parse_modes_parser.add_argument("--jobs", type=int, default=4, help="Jobs per synthetic section")
+    parse_modes_parser.set_defaults(func=benchmark_work_experience)
+
+    headings_parser = subparsers.add_parser("section-headings", help="Section heading matcher with a large synonym list")
+    headings_parser.add_argument("--docs", type=int, default=200, help="Number of synthetic resumes")
+    headings_parser.add_argument("--synonyms", type=int, default=500, help="Heading variations for the section matcher")
+    headings_parser.set_defaults(func=benchmark_section_headings)
+
+    redaction_parser = subparsers.add_parser("redaction", help="Span-based clean_text against the previous implementation")
+    redaction_parser.add_argument("--lines", type=int, default=5000, help="Lines of personal info in the document")
+    redaction_parser.set_defaults(func=benchmark_redaction)
+
+    education_parser = subparsers.add_parser("education", help="Linear-time university split on adversarial education sections")
+    education_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 4000, 16000, 64000], help="Section lengths in characters")
+    education_parser.add_argument("--legacy-max", type=int, default=16000, help="Longest section to run the legacy regex on")
+    education_parser.set_defaults(func=benchmark_education)
+
+    args = arg_parser.parse_args()
+    if args.benchmark is None:
+        args = arg_parser.parse_args(sys.argv[1:] + ["stages"])
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,109 +1,92 @@
-import fitz
-import re
-import spacy
-import phonenumbers
 import os
 import json
 
-nlp = spacy.load("en_core_web_sm")
-
-def pdf_to_text(pdf_path, output_directory):
-    pdf_document = fitz.open(pdf_path)
-    full_text = ""
-    for page in pdf_document:
-        full_text += page.get_text()
-    pdf_document.close()
-
-    # Handle and remove special characters
-    full_text = full_text.replace("\u2022", " ")  # Bullet
-    full_text = full_text.replace("\u25cf", " ")  # Black Circle
-    full_text = full_text.replace("\u25cb", " ")  # White Circle
-    full_text = full_text.replace('\u2019', "'")  # Apostrophe
-    full_text = full_text.replace('\u2013', '-')  # Hyphen or Dash
-    full_text = full_text.replace('\ufffd', '')   # Unknown special character
-
-    # Generate the output .txt file name based on the PDF file name
-    txt_file_name = os.path.splitext(os.path.basename(pdf_path))[0] + ".txt"
-
-    # Save the extracted text to a new .txt file in the specified output directory
-    txt_file_path = os.path.join(output_directory, txt_file_name)
-    with open(txt_file_path, 'w', encoding='utf-8') as f:
-        f.write(full_text)
-        print(f"Writing txt file for {txt_file_name}")
-
-    return txt_file_path
-
-def extract_name(doc):
-    for ent in doc.ents:
-        if ent.label_ == "PERSON":
-            return ent.text.strip()
-    return "Unknown"  # Return Unknown if no name is found
-
-def extract_email(text):
-    email_match = re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
-    if email_match:
-        return email_match.group()
-    return ""
-
-def extract_linkedin_url(text):
-    # Regular expression pattern to extract LinkedIn URLs
-    linkedin_pattern = r'https?://(?:www\.)?linkedin\.com/[\w\-/]+'
-    match = re.search(linkedin_pattern, text)
-    return match.group(0) if match else ""
-
-def extract_github_url(text):
-    # Regular expression pattern to extract GitHub URLs
-    github_pattern = r'https?://(?:www\.)?github\.com/[\w\-]+'
-    match = re.search(github_pattern, text)
-    return match.group(0) if match else ""
-
-def extract_phone_number(text):
-    for match in phonenumbers.PhoneNumberMatcher(text, "US"):
-        phone_number = phonenumbers.format_number(match.number, phonenumbers.PhoneNumberFormat.E164)
-        if phone_number:
-            return phone_number
-    return ""
-
-def extract_details_from_text(text):
-
-    name = extract_name(nlp(text))
-    email = extract_email(text)
-
-    linkedin_url = extract_linkedin_url(text)
-    github_url = extract_github_url(text)
-
-    phone = extract_phone_number(text)
-
-
-    details = {
-        'name': name,
-        'email': email,
-        'phone': phone,
-        'linkedin': linkedin_url,
-        'github': github_url,
-    }
-    return details
-
-
-def clean_text(text, details):
-    cleaned_text = text
-
-    # Remove extracted personal information
-    if details['name']:
-        cleaned_text = cleaned_text.replace(details['name'], '')
-    if details['email']:
-        cleaned_text = cleaned_text.replace(details['email'], '')
+from result_cache import ResultCache, content_key
+from resume_core import iter_pdf_pages, extract_contacts, DEFAULT_REGION
+from sinks import TextFileSink, JsonlSink, atomic_open
+from ingest_manifest import IngestManifest, watch_directory
+from ml_resumeparser import resume_parser
+
+# Bump whenever the personal info handling changes, so older cached results are not reused.
+# Cache keys also include the parser's pipeline_version().
+DATAPREP_VERSION = "dataprep-3"
+
+# Keys of the parsed details that make up the personal info JSON
+PERSONAL_INFO_KEYS = ('name', 'email', 'phone', 'linkedin', 'github')
+
+def process_resume(pdf_path, cache=None, full_details=True):
+    """Single pass over one PDF, sharing the text extraction and NER between both scripts.
+
+    Returns (text, details, personal_info, cleaned_text): the structured details of
+    ML-resumeparser's extract_details_from_pages, the personal info subset of them and the text
+    with that personal info removed. The name is read from the first page, as ML-resumeparser
+    does. Without full_details only the personal info is extracted, skipping the section
+    parsing, and details is the personal info.
+    """
+    cached = None
+    if cache:
+        with open(pdf_path, 'rb') as f:
+            pdf_bytes = f.read()
+        key = content_key(pdf_bytes, f"{DATAPREP_VERSION}/{resume_parser.pipeline_version()}/{'full' if full_details else 'personal'}")
+        cached = cache.get(key)
+
+    if cached:
+        pdf_text, details = cached['text'], cached['details']
+    else:
+        pages = iter_pdf_pages(pdf_path, pdf_bytes if cache else None)
+        pdf_text, details = resume_parser.extract_details_from_pages(pages, personal_only=not full_details)
+        if cache:
+            cache.put(key, {'text': pdf_text, 'details': details})
+
+    personal_info = {key: details[key] for key in PERSONAL_INFO_KEYS}
+    return pdf_text, details, personal_info, clean_text(pdf_text, personal_info)
+
+def _find_all(text, value):
+    spans = []
+    start = text.find(value)
+    while start != -1:
+        spans.append((start, start + len(value)))
+        start = text.find(value, start + len(value))
+    return spans
+
+def merge_spans(spans):
+    """Sorts (start, end) spans and merges the ones that overlap or touch."""
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def collect_pii_spans(text, details, region=DEFAULT_REGION):
+    """Returns the merged offsets of every occurrence in text of the personal info in details."""
+    spans = []
+    # "Unknown" is the placeholder for a name that was not found, not text to redact
+    if details['name'] and details['name'] != "Unknown":
+        spans.extend(_find_all(text, details['name']))
+    for key in ('email', 'linkedin', 'github'):
+        if details[key]:
+            spans.extend(_find_all(text, details[key]))
     if details['phone']:
-        phone_matches = list(phonenumbers.PhoneNumberMatcher(cleaned_text, "US"))
-        for match in phone_matches:
-            start, end = match.start, match.end
-            cleaned_text = cleaned_text[:start] + cleaned_text[end:]
-    if details['linkedin']:
-        cleaned_text = cleaned_text.replace(details['linkedin'], '')
-    if details['github']:
-        cleaned_text = cleaned_text.replace(details['github'], '')
-
-    return cleaned_text
+        # Match phones on the original text, so the offsets are never shifted by earlier removals
+        spans.extend((contact.start, contact.end) for contact in extract_contacts(text, region) if contact.kind == 'phone')
+    return merge_spans(spans)
+
+def redact_spans(text, spans, replacement=''):
+    """Builds text with each of the sorted, non-overlapping spans replaced, in one pass."""
+    parts = []
+    position = 0
+    for start, end in spans:
+        parts.append(text[position:start])
+        parts.append(replacement)
+        position = end
+    parts.append(text[position:])
+    return ''.join(parts)
+
+def clean_text(text, details, replacement=''):
+    # Remove extracted personal information, or replace it with a token such as "[REDACTED]"
+    return redact_spans(text, collect_pii_spans(text, details), replacement)
 
 
 def remove_and_save_personal_info(input_text_path, output_directory, resume_details):
@@ -118,46 +101,104 @@ def remove_and_save_personal_info(input_text_path, output_directory, resume_deta
 
     # Save the cleaned text to a new .txt file in the specified output directory
     output_file_path = os.path.join(output_directory, output_file_name)
-    with open(output_file_path, 'w', encoding='utf-8') as output_file:
+    with atomic_open(output_file_path, 'w', encoding='utf-8') as output_file:
         output_file.write(cleaned_text)
         print(f"Writing cleaned txt file for {output_file_name}")
 
 def save_details_to_json(details, output_file, output_directory):
     output_file_path = os.path.join(output_directory, output_file)
-    with open(output_file_path, 'w', encoding='utf-8') as f:
+    with atomic_open(output_file_path, 'w', encoding='utf-8') as f:
         json.dump(details, f, indent=4)
 
 def main():
     input_directory = '/Users/sarjhana/Projects/Campuzzz/Testing'
-    output_directory_txt = '/Users/sarjhana/Projects/Campuzzz/CV-text-files-test'
+    output_directory_txt = '/Users/sarjhana/Projects/Campuzzz/CV-text-files-test'  # None to skip writing the extracted text
     output_directory_cleaned_txt = '/Users/sarjhana/Projects/Campuzzz/prepared-CV-test'
     output_directory_json = '/Users/sarjhana/Projects/Campuzzz/personal-info-JSON-test'
-
-    pdf_files = [file for file in os.listdir(input_directory) if file.endswith('.pdf')]
-    file_count = 0
-
-    for pdf_file in pdf_files:
-        file_count += 1
-        print(f"Processing File {file_count}/{len(pdf_files)} - {pdf_file}")
-
-        pdf_path = os.path.join(input_directory, pdf_file)
-        txt_file_path = pdf_to_text(pdf_path, output_directory_txt)
-
-        with open(txt_file_path, 'r', encoding='utf-8') as f:
-            pdf_text = f.read()
-
-        resume_details = extract_details_from_text(pdf_text)
-        output_file = os.path.splitext(pdf_file)[0] + '_details.json'
-        save_details_to_json(resume_details, output_file, output_directory_json)
-
-        # Clean the text
-        cleaned_text = clean_text(pdf_text, resume_details)
-
-        # Remove extracted details and save cleaned text to a separate text file
-        cleaned_txt_file_path = os.path.join(output_directory_cleaned_txt, os.path.splitext(pdf_file)[0] + "_cleaned.txt")
-        with open(cleaned_txt_file_path, 'w', encoding='utf-8') as f:
-            f.write(cleaned_text)
-            print(f"Writing cleaned txt file for {pdf_file}")
+    output_details_jsonl_file = '/Users/sarjhana/Projects/Campuzzz/CV-processed-details-test.jsonl'  # Structured details of every resume, None to skip
+    cache_path = '/Users/sarjhana/Projects/Campuzzz/dataprep-cache.sqlite'  # Cache of extracted text and details, None to disable
+    manifest_path = '/Users/sarjhana/Projects/Campuzzz/dataprep-ingest-manifest.sqlite'  # Checkpoint of handled PDFs so a run resumes where the last one stopped, None to process every file
+    watch = False  # Keep polling input_directory and process new or changed PDFs as they arrive (requires manifest_path)
+    poll_interval = 5  # Seconds between scans of input_directory when watching
+    checkpoint_every = 500  # Files between manifest commits, at most this many are processed again after a crash
+
+    cache = ResultCache(cache_path) if cache_path else None
+    manifest = IngestManifest(manifest_path) if manifest_path else None
+    text_sink = TextFileSink(output_directory_txt) if output_directory_txt else None
+    # Files since the last checkpoint are processed again after a crash, so the JSONL may hold a resume twice
+    details_sink = JsonlSink(output_details_jsonl_file, append=manifest_path is not None) if output_details_jsonl_file else None
+
+    if manifest:
+        batches = watch_directory(input_directory, manifest, '.pdf', watch, poll_interval)
+    else:
+        pdf_files = [file for file in os.listdir(input_directory) if file.endswith('.pdf')]
+        batches = [[(os.path.join(input_directory, pdf_file), None) for pdf_file in pdf_files]]
+
+    files_since_checkpoint = 0
+
+    def checkpoint():
+        # Make the JSONL durable before the manifest records its files as done
+        nonlocal files_since_checkpoint
+        files_since_checkpoint = 0
+        if details_sink:
+            details_sink.flush()
+        manifest.commit()
+
+    def file_handled():
+        # Done and failed files both count, so a failure never delays the next checkpoint
+        nonlocal files_since_checkpoint
+        files_since_checkpoint += 1
+        if files_since_checkpoint >= checkpoint_every:
+            checkpoint()
+
+    try:
+        for batch in batches:
+            for file_count, (pdf_path, fingerprint) in enumerate(batch, start=1):
+                pdf_file = os.path.basename(pdf_path)
+                print(f"Processing File {file_count}/{len(batch)} - {pdf_file}")
+
+                try:
+                    pdf_text, resume_details, personal_info, cleaned_text = process_resume(pdf_path, cache, full_details=details_sink is not None)
+                except Exception as e:
+                    if not manifest:
+                        raise
+                    # Skip the file and keep ingesting, it is tried again once it changes
+                    print(f"Failed to process {pdf_file}: {e!r}")
+                    manifest.mark_failed(pdf_path, fingerprint, repr(e))
+                    file_handled()
+                    continue
+
+                if text_sink:
+                    text_sink.write(os.path.splitext(pdf_file)[0], pdf_text)
+                if details_sink:
+                    details_sink.write(pdf_file, resume_details)
+
+                output_file = os.path.splitext(pdf_file)[0] + '_details.json'
+                save_details_to_json(personal_info, output_file, output_directory_json)
+
+                # Remove extracted details and save cleaned text to a separate text file
+                cleaned_txt_file_path = os.path.join(output_directory_cleaned_txt, os.path.splitext(pdf_file)[0] + "_cleaned.txt")
+                with atomic_open(cleaned_txt_file_path, 'w', encoding='utf-8') as f:
+                    f.write(cleaned_text)
+                    print(f"Writing cleaned txt file for {pdf_file}")
+
+                if manifest:
+                    manifest.mark_done(pdf_path, fingerprint)
+                    file_handled()
+            if manifest:
+                checkpoint()
+    except KeyboardInterrupt:
+        if not watch:
+            raise
+    finally:
+        if details_sink:
+            details_sink.close()
+        if manifest:
+            # The closed JSONL has written everything
+            manifest.commit()
+            manifest.close()
+        if cache:
+            cache.close()
 
 if __name__ == "__main__":
     main()
@@ -1,46 +1,250 @@
-import spacy
-import gensim.downloader as api
 from collections import Counter
+import io
+import itertools
 import json
+import math
+import multiprocessing
+import os
+import re
 
-def load_word2vec_model():
-    # Load the word2vec model (this may take some time as the model is large)
-    return api.load('word2vec-google-news-300')
+import numpy as np
+
+from nlp_models import load_model, parse_many
+from ml_resumeparser import resume_parser
+
+WORD2VEC_MODEL_NAME = 'word2vec-google-news-300'
+WORD2VEC_PATH = 'word2vec-google-news-300.kv'  # Converted copy, memory-mapped on load
+
+def convert_word2vec_model(path=WORD2VEC_PATH, model_name=WORD2VEC_MODEL_NAME):
+    """Downloads the vectors once and saves them as KeyedVectors that can be memory-mapped."""
+    import gensim.downloader as api
+    word2vec_model = api.load(model_name)
+    # Store unit-length vectors too, so similarity searches do not normalize 3M vectors per run
+    word2vec_model.fill_norms()
+    word2vec_model.save(path)
+
+def load_word2vec_model(path=WORD2VEC_PATH):
+    """Returns the word vectors memory-mapped from path, converting the downloaded model on first use.
+
+    The vectors stay on disk and are paged in as they are read, so loading takes milliseconds
+    and several processes share the same pages.
+    """
+    from gensim.models import KeyedVectors
+    if not os.path.exists(path):
+        # The first run downloads and converts the full model, this takes some minutes
+        convert_word2vec_model(path)
+    return KeyedVectors.load(path, mmap='r')
+
+def phrase_variants(phrase):
+    # The Google News vectors store phrases joined by underscores, in their original case
+    words = phrase.split()
+    for separator in ('_', ''):
+        for variant in (words, [word.capitalize() for word in words], [word.lower() for word in words]):
+            yield separator.join(variant)
+
+def phrase_vector(word2vec_model, phrase):
+    """Returns the vector of a heading, or the mean of its words' vectors if the phrase itself is missing."""
+    for variant in phrase_variants(phrase):
+        if variant in word2vec_model.key_to_index:
+            return word2vec_model[variant]
+    word_vectors = [word2vec_model[word] for word in phrase.split() if word in word2vec_model.key_to_index]
+    if not word_vectors:
+        return None
+    return np.mean(word_vectors, axis=0)
+
+def normalize_term(term):
+    # 'Work_Experience' -> 'work experience'
+    return " ".join(term.replace('_', ' ').split()).lower()
 
 def find_similar_terms(word2vec_model, heading, top_n=5):
     # Get the word vector for the given heading
-    try:
-        heading_vector = word2vec_model[heading]
-    except KeyError:
+    heading_vector = phrase_vector(word2vec_model, heading)
+    if heading_vector is None:
         print(f"Heading '{heading}' not found in the word2vec model.")
         return []
 
-    # Find similar words using word embeddings
-    similar_terms = word2vec_model.similar_by_vector(heading_vector, topn=top_n+1)
-    similar_terms = [(word, similarity) for word, similarity in similar_terms if word != heading]
+    # Find similar words using word embeddings, leaving out the heading's own spellings
+    similar_terms = word2vec_model.similar_by_vector(heading_vector, topn=top_n + 4)
+    similar_terms = [(word, similarity) for word, similarity in similar_terms if normalize_term(word) != normalize_term(heading)]
+
+    return similar_terms[:top_n]
+
+def build_heading_synonym_index(word2vec_model, section_variations=resume_parser.SECTION_VARIATIONS, top_n=10, min_similarity=0.6,
+                                min_words=2):
+    """Returns {main title: [synonyms]} in the format of ML-resumeparser's section_synonyms.json.
+
+    Synonyms are the terms nearest to the known variations of each section; main titles are only
+    keys, "Extra" is not a heading. A term close to several sections goes to the one it is most
+    similar to, and known variations are left out. Terms shorter than min_words are left out
+    too, as in add_heading_variants.
+    """
+    known = {normalize_term(heading) for headings in section_variations.values() for heading in headings}
+    best = {}
+    for main_title, headings in section_variations.items():
+        for heading in headings:
+            for term, similarity in find_similar_terms(word2vec_model, heading, top_n):
+                term = normalize_term(term)
+                # Single words of a multi-word heading come back from the averaged vector, they are not headings
+                if term in normalize_term(heading).split():
+                    continue
+                if similarity < min_similarity or term in known or len(term.split()) < min_words or not term.replace(' ', '').isalpha():
+                    continue
+                if term not in best or similarity > best[term][1]:
+                    best[term] = (main_title, similarity)
+
+    index = {main_title: [] for main_title in section_variations}
+    for term, (main_title, similarity) in sorted(best.items(), key=lambda item: -item[1][1]):
+        index[main_title].append(term)
+    return index
+
+def save_heading_synonym_index(index, path=resume_parser.SECTION_SYNONYMS_FILE):
+    # Read by ML-resumeparser's load_section_variations, so the parser never loads the vectors
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+
+# A heading candidate is a short line of capitalized words, optionally ending with a colon
+HEADING_CANDIDATE_PATTERN = re.compile(r'^[ \t]*((?:[A-Z][A-Za-z]*|&|and|of)(?:[ \t]+(?:[A-Z][A-Za-z]*|&|and|of)){0,3})[ \t]*:?[ \t]*$')
+
+def mine_heading_candidates(lines):
+    """Counts the lines of a corpus that look like section headings, keyed by normalized heading.
+
+    Only lines after a blank line, or at the start, count: headings open a block of text.
+    """
+    candidates = Counter()
+    previous_blank = True
+    for line in lines:
+        if previous_blank:
+            match = HEADING_CANDIDATE_PATTERN.match(line)
+            if match:
+                candidates[normalize_term(match.group(1))] += 1
+        previous_blank = not line.strip()
+    return candidates
+
+def _unit_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
 
-    return similar_terms
+def score_heading_candidates(word2vec_model, candidates, section_variations=resume_parser.SECTION_VARIATIONS,
+                             min_similarity=0.5, batch_size=4096):
+    """Scores heading candidates against the sections and ranks the ones the parser does not know yet.
 
-def process_resume_text(all_resumes_text):
-    nlp = spacy.load("en_core_web_sm")
+    candidates maps each heading to its frequency. Every section is represented by the unit
+    vectors of its known variations; each batch of candidate vectors is scored
+    against all of them with one matrix product and a candidate's similarity to a section is
+    its best match among them. Returns (heading, frequency, main title, similarity) for the
+    candidates at or above min_similarity, by similarity weighted by log frequency.
+    """
+    known = {normalize_term(heading) for headings in section_variations.values() for heading in headings}
 
-    # Process the text in smaller chunks using spaCy
-    chunk_size = 100000  # Adjust this value as needed
-    num_chunks = len(all_resumes_text) // chunk_size + 1
+    section_rows, row_sections = [], []
+    for section_index, (main_title, headings) in enumerate(section_variations.items()):
+        for heading in headings:
+            vector = phrase_vector(word2vec_model, heading)
+            if vector is not None:
+                section_rows.append(vector)
+                row_sections.append(section_index)
+    section_matrix = _unit_rows(np.asarray(section_rows, dtype=np.float32))
+    row_sections = np.asarray(row_sections)
+    main_titles = list(section_variations)
+
+    unseen = ((heading, frequency) for heading, frequency in candidates.items() if heading not in known)
+    ranked = []
+    while True:
+        batch = list(itertools.islice(unseen, batch_size))
+        if not batch:
+            break
+        headings, vectors = [], []
+        for heading, frequency in batch:
+            vector = phrase_vector(word2vec_model, heading)
+            if vector is not None:
+                headings.append((heading, frequency))
+                vectors.append(vector)
+        if not vectors:
+            continue
+        similarities = _unit_rows(np.asarray(vectors, dtype=np.float32)) @ section_matrix.T
+        best_rows = similarities.argmax(axis=1)
+        best_similarities = similarities[np.arange(len(vectors)), best_rows]
+        for (heading, frequency), row, similarity in zip(headings, best_rows, best_similarities):
+            if similarity >= min_similarity:
+                ranked.append((heading, frequency, main_titles[row_sections[row]], float(similarity)))
+
+    ranked.sort(key=lambda candidate: candidate[3] * math.log1p(candidate[1]), reverse=True)
+    return ranked
+
+def mine_heading_variants(word2vec_model, all_resumes_text_file, min_frequency=3, min_similarity=0.5):
+    """Returns the ranked heading variants of a corpus file seen at least min_frequency times."""
+    with open(all_resumes_text_file, 'r', encoding='utf-8') as f:
+        candidates = mine_heading_candidates(f)
+    candidates = {heading: frequency for heading, frequency in candidates.items() if frequency >= min_frequency}
+    return score_heading_candidates(word2vec_model, candidates, min_similarity=min_similarity)
+
+def add_heading_variants(index, ranked, min_similarity=0.6, min_words=2):
+    """Adds the reviewed variants at or above min_similarity to a heading-synonym index.
+
+    Variants shorter than min_words are left out: when no heading is alone on its line the
+    parser matches headings inside lines, where words like "training" would split a section.
+    """
+    for heading, _, main_title, similarity in ranked:
+        synonyms = index.setdefault(main_title, [])
+        if similarity >= min_similarity and len(heading.split()) >= min_words and heading not in synonyms:
+            synonyms.append(heading)
+    return index
+
+def iter_text_chunks(lines, chunk_size=100000):
+    # Group lines into chunks of about chunk_size characters, so words and lines are never split
+    chunk, length = [], 0
+    for line in lines:
+        chunk.append(line)
+        length += len(line)
+        if length >= chunk_size:
+            yield ''.join(chunk)
+            chunk, length = [], 0
+    if chunk:
+        yield ''.join(chunk)
+
+def count_tokens(chunks):
+    # is_stop and is_punct are lexical attributes, so the tokenizer alone is enough
     tokens_counter = Counter()
+    for doc in parse_many(chunks, "tokenizer"):
+        tokens_counter.update(token.text for token in doc if not token.is_stop and not token.is_punct)
+    return tokens_counter
+
+def count_corpus_tokens(chunks, n_process=1, chunks_per_task=8):
+    """Counts the tokens of a stream of text chunks, merging the Counters of n_process workers.
 
-    for i in range(num_chunks):
-        start_idx = i * chunk_size
-        end_idx = (i + 1) * chunk_size
-        chunk_text = all_resumes_text[start_idx:end_idx]
-        doc = nlp(chunk_text)
-        chunk_tokens_counter = Counter(token.text for token in doc if not token.is_stop and not token.is_punct)
-        tokens_counter += chunk_tokens_counter
+    At most two tasks per worker are queued at once, so memory stays bounded however long the
+    stream is.
+    """
+    chunks = iter(chunks)
+    tasks = iter(lambda: list(itertools.islice(chunks, chunks_per_task)), [])
+    if n_process == 1:
+        tokens_counter = Counter()
+        for task in tasks:
+            tokens_counter.update(count_tokens(task))
+        return tokens_counter
+
+    tokens_counter = Counter()
+    with multiprocessing.Pool(n_process, initializer=load_model) as pool:
+        pending = []
+        for task in tasks:
+            pending.append(pool.apply_async(count_tokens, (task,)))
+            if len(pending) >= 2 * n_process:
+                tokens_counter.update(pending.pop(0).get())
+        for result in pending:
+            tokens_counter.update(result.get())
+    return tokens_counter
+
+def process_resume_text(all_resumes_text, top_n=50):
+    tokens_counter = count_corpus_tokens(iter_text_chunks(io.StringIO(all_resumes_text)))
 
     # Get the top 50 most common tokens and their frequencies
-    top_50_tokens = tokens_counter.most_common(50)
+    return tokens_counter.most_common(top_n)
 
-    return top_50_tokens
+def process_resume_file(all_resumes_text_file, n_process=1, chunk_size=100000, top_n=50):
+    """Like process_resume_text for a corpus file, read line by line instead of all at once."""
+    with open(all_resumes_text_file, 'r', encoding='utf-8') as f:
+        tokens_counter = count_corpus_tokens(iter_text_chunks(f, chunk_size), n_process)
+    return tokens_counter.most_common(top_n)
 
 def save_top_50_tokens_to_json(top_50_tokens, education_similar_terms, work_experience_similar_terms):
     data = {
@@ -58,18 +262,15 @@ def save_synonyms_to_txt(filename, heading, similar_terms):
             f.write(f"{term}: Similarity = {similarity:.2f}\n")
 
 def main():
-    nlp = spacy.load("en_core_web_sm")
-
-    # Read the contents of the all_resumes_text.txt file
+    # The concatenated resumes are streamed, so the file can be larger than memory
     all_resumes_text_file = '# path to file with concatenated resumes'
-    with open(all_resumes_text_file, 'r', encoding='utf-8') as f:
-        all_resumes_text = f.read()
+    n_process = multiprocessing.cpu_count()
 
-    # Load word2vec model
+    # Load word2vec model, memory-mapped after the first run
     word2vec_model = load_word2vec_model()
 
     # Process the resume text
-    top_50_tokens = process_resume_text(all_resumes_text)
+    top_50_tokens = process_resume_file(all_resumes_text_file, n_process=n_process)
 
     # Find similar terms for the heading "education"
     heading_to_find_terms_for_education = "education"
@@ -95,5 +296,15 @@ def main():
     work_experience_synonyms_file = 'work_experience_synonyms.txt'
     save_synonyms_to_txt(work_experience_synonyms_file, heading_to_find_terms_for_work_experience, work_experience_similar_terms)
 
+    # Rank the headings used in the corpus that the parser does not know yet. They are only written
+    # for review, add the approved ones to the index with add_heading_variants
+    heading_variants = mine_heading_variants(word2vec_model, all_resumes_text_file)
+    with open('heading_variants.json', 'w', encoding='utf-8') as f:
+        json.dump([{'heading': heading, 'frequency': frequency, 'section': main_title, 'similarity': similarity}
+                   for heading, frequency, main_title, similarity in heading_variants], f, indent=2)
+
+    # Save the heading synonyms the parser loads at startup
+    save_heading_synonym_index(build_heading_synonym_index(word2vec_model))
+
 if __name__ == "__main__":
     main()
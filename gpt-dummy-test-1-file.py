@@ -1,7 +1,15 @@
 import openai
+import os
+import json
+
+from llm_cache import CompletionCache
+from llm_prompts import parse_response
 
 openai.api_key = ""
 
+# Bump whenever the prompt below changes, so cached responses to the old prompt are not reused
+PROMPT_TEMPLATE_VERSION = "dummy-1"
+
 def get_completion(prompt, model="gpt-3.5-turbo", temperature=0): 
     messages = [{"role": "user", "content": prompt}]
     response = openai.ChatCompletion.create(
@@ -68,9 +76,12 @@ prompt = f"""Extract details from the text of resume delimited by angle brackets
                 
                 
                 <{text}>"""
-response = get_completion(prompt)
+cache = CompletionCache('llm-response-cache.sqlite')
+response = cache.get_completion(get_completion, text, prompt, PROMPT_TEMPLATE_VERSION)
+cache.close()
 
-save_details_to_json(response,'Resume2.json', '#file path to where JSON must be stored')
+# Save the parsed JSON rather than the response string, which json.dump would encode a second time
+save_details_to_json(parse_response(response),'Resume2.json', '#file path to where JSON must be stored')
 
 
 prompt = f"""Extract details from the text of resume delimited by angle brackets into a JSON. The details that need to be extracted are: 
@@ -1,8 +1,13 @@
+import asyncio
 import openai
 import os
 import json
 import time
 
+from llm_cache import CompletionCache
+from llm_client import AsyncChatClient
+from llm_prompts import PROMPT_TEMPLATE_VERSION, extract_resume
+
 openai.api_key = ""
 
 def get_completion(prompt, model="gpt-3.5-turbo", temperature=0): 
@@ -14,76 +19,75 @@ def get_completion(prompt, model="gpt-3.5-turbo", temperature=0):
     )
     return response.choices[0].message["content"]
 
-json_sample = {
-                "name": "",
-                "email": "",
-                "phone": "",
-                "address": "",
-                "linkedin URL": "",
-                "github URL": "",
-                "education": [
-                    {
-                    "education level": "",
-                    "specialization": "",
-                    "university name": "",
-                    "duration": "",
-                    "marks/percentage/cgpa obtained": "",
-                    "additional information": "",
-                    },
-                ],
-                "work_experience": [
-                    {
-                    "title": "",
-                    "company": "",
-                    "start_date": "",
-                    "end_date": "",
-                    "description": ""
-                    },
-                ],
-                "skills": [],
-                "certifications": [],
-                "projects": [],
-                "extracurricular_activities": [],
-                }
-
 def main():
 
     input_directory = '#text files directory'  
     output_directory = '#output directory'
 
-    # Get a list of all PDF files in the input directory
-    pdf_files = [file for file in os.listdir(input_directory) if file.endswith('.txt')]
-    # Initialize a counter variable to keep track of the file number
-    file_count = 0
+    concurrency = 8  # Requests in flight at once
+    requests_per_minute = 3500  # Account rate limits, None for no limit
+    tokens_per_minute = 90000
+    request_timeout = 120  # Seconds before a call is abandoned and retried
+    max_retries = 5
+    api_base = None  # Set to the URL printed by llm_stub_server.py to run against the local stub
+    cache_path = 'llm-response-cache.sqlite'  # Responses reused across runs, None to disable
+    offline = False  # Only answer from the cache, never call the API
+    max_prompt_tokens = 3000  # Longer resumes are split into one prompt per section, sent in parallel
+    stream_responses = True  # Validate responses as they stream in and abandon invalid ones early
+    max_repairs = 1  # Follow-up requests for fields that were missing or invalid
 
-    for pdf_file in pdf_files:
-        file_count += 1
-        print(f"Processing File {file_count}/{len(pdf_files)} - {pdf_file}")
+    cache = CompletionCache(cache_path, offline=offline) if cache_path else None
 
-        # Construct the full path of the PDF file
-        txt_file_path = os.path.join(input_directory, pdf_file)
+    # Get a list of all text files in the input directory
+    txt_files = [file for file in os.listdir(input_directory) if file.endswith('.txt')]
+
+    client = AsyncChatClient(
+        concurrency=concurrency,
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute,
+        timeout=request_timeout,
+        max_retries=max_retries,
+        api_base=api_base,
+        cache=cache,
+        prompt_version=PROMPT_TEMPLATE_VERSION,
+    )
 
-        with open(txt_file_path, 'r', encoding='utf-8') as f:
-            pdf_text = f.read()
-        
-        prompt = f"""Extract details from the text of resume delimited by angle brackets into a JSON. For any details that are not found, use the word 'Unknown'.
-                The JSON should have a similar structure to the keys delimited by triple backticks but it can have multiple entries of details in each section. 
-                Education section must capture granular details where education level refers to the degree level for example Bachelors, Masters or PhD or such synonymous acronyms and specialisation refers to the major or course name.
-                ```{json_sample}``` <{pdf_text}>"""
+    def jobs():
+        # Read each resume only when a worker is ready to send it
+        for txt_file in txt_files:
+            txt_file_path = os.path.join(input_directory, txt_file)
+            with open(txt_file_path, 'r', encoding='utf-8') as f:
+                pdf_text = f.read()
+            yield txt_file, client, pdf_text, max_prompt_tokens, stream_responses, None, max_repairs
 
-        start_time = time.time()
-        response = get_completion(prompt)
-        end_time = time.time()
+    start_time = time.time()
+    completed = []
 
-        execution_time = end_time - start_time
-        print(f"Response received in {execution_time:.2f} seconds")
+    def save_result(txt_file, result, error):
+        completed.append(txt_file)
+        elapsed = time.time() - start_time
+        if error:
+            print(f"File {len(completed)}/{len(txt_files)} - {txt_file} failed after {elapsed:.2f} seconds: {error!r}")
+            return
 
-        file_name = os.path.splitext(pdf_file)[0] + '_processed.json'
+        details, report = result
+        print(f"Prompt tokens for {txt_file}: {report['tokens_before']} before compaction, {report['tokens_after']} after in {report['prompts']} prompt(s)")
+        if report['first_field_seconds'] is not None:
+            print(f"First field of {txt_file} after {report['first_field_seconds']:.2f} seconds, {report['repairs']} repair request(s)")
+
+        file_name = os.path.splitext(txt_file)[0] + '_processed.json'
         json_file_path = os.path.join(output_directory, file_name)
         with open(json_file_path, 'w', encoding='utf-8') as f:
-                f.write(response)
+            json.dump(details, f, indent=4)
+
+        print(f"File {len(completed)}/{len(txt_files)} - {txt_file} saved, {elapsed:.2f} seconds since start")
+
+    asyncio.run(client.map(jobs(), extract_resume, save_result))
 
-        print("prompt executed, json saved")
+    if cache:
+        stats = cache.stats()
+        print(f"Response cache: {stats['hits']} hits, {stats['misses']} misses")
+        cache.close()
 
 if __name__ == "__main__":
     main()
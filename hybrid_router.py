@@ -0,0 +1,226 @@
+import asyncio
+import concurrent.futures
+import json
+import os
+import time
+
+from llm_cache import CompletionCache
+from llm_client import AsyncChatClient
+from llm_prompts import PROMPT_TEMPLATE_VERSION, compact_text, extract_fields
+from llm_stream import SchemaError
+from ml_resumeparser import resume_parser
+
+# Run the cheap local extractor first and only ask the LLM for the fields it is unsure about
+
+# Field of extract_details_from_text -> field of llm_prompts.json_sample
+LLM_FIELDS = {
+    'name': 'name',
+    'email': 'email',
+    'phone': 'phone',
+    'linkedin': 'linkedin URL',
+    'github': 'github URL',
+    'education': 'education',
+    'work_experience': 'work_experience',
+    'skills': 'skills',
+    'projects': 'projects',
+    'certifications': 'certifications',
+    'extra': 'extracurricular_activities',
+}
+
+# Section each field is read from, fields not listed here come from the header before the first heading
+FIELD_SECTIONS = {
+    'education': "Education",
+    'work_experience': "Work Experience",
+    'skills': "Skills",
+    'projects': "Projects",
+    'certifications': "Certifications",
+    'extra': "Extra",
+}
+
+HEADER_CHARACTERS = 1500  # Header excerpt used when a resume has no section headings
+
+# Local parses share one spaCy model and thread-local instrumentation, so they run one at a time
+# on a single thread while the event loop keeps the LLM calls of other resumes going
+_local_parse_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+def _entry_completeness(entries, keys):
+    # Fraction of the expected keys filled in across all entries
+    filled = sum(1 for entry in entries for key in keys if entry.get(key))
+    return filled / (len(entries) * len(keys))
+
+def score_fields(details, sections):
+    """Returns a confidence between 0 and 1 for every field of the local extractor's details."""
+    scores = {
+        'name': 0.0 if details['name'] == "Unknown" else 1.0,
+        # Contact details are often genuinely absent, so a miss is only moderately suspicious
+        'email': 1.0 if details['email'] else 0.5,
+        'phone': 1.0 if details['phone'] else 0.5,
+        'linkedin': 1.0 if details['linkedin'] else 0.6,
+        'github': 1.0 if details['github'] else 0.6,
+    }
+
+    for field, section in FIELD_SECTIONS.items():
+        value = details[field]
+        if field == 'education' and value:
+            scores[field] = _entry_completeness(value, ('university_name', 'course_name', 'dates_attended'))
+        elif field == 'work_experience' and value:
+            scores[field] = _entry_completeness(value, ('company_name', 'job_title', 'dates_worked'))
+        elif value:
+            scores[field] = 1.0
+        elif section in sections:
+            # The heading was found but nothing could be extracted from the section
+            scores[field] = 0.0
+        elif field in ('education', 'work_experience', 'skills'):
+            # Most resumes have these, a missing heading usually means it was not recognized
+            scores[field] = 0.2
+        else:
+            scores[field] = 0.6
+    return scores
+
+def _join_items(values):
+    return "\n".join(str(value) for value in values if value and value != "Unknown") or None
+
+def _education_entry(entry):
+    duration = entry.get("duration", "")
+    start_year, end_year = resume_parser.extract_start_end_years(duration)
+    return {
+        'university_name': entry.get("university name", ""),
+        'course_name': " ".join(part for part in (entry.get("education level", ""), entry.get("specialization", "")) if part and part != "Unknown"),
+        'dates_attended': duration,
+        'start_year': start_year,
+        'end_year': end_year,
+        'marks_or_percentage': entry.get("marks/percentage/cgpa obtained", ""),
+        'additional_info': [entry["additional information"]] if entry.get("additional information") else [],
+    }
+
+def _work_experience_entry(entry):
+    dates_worked = " - ".join(part for part in (entry.get("start_date", ""), entry.get("end_date", "")) if part)
+    start_year, end_year = resume_parser.extract_start_end_years(dates_worked)
+    return {
+        'company_name': entry.get("company", ""),
+        'job_title': entry.get("title", ""),
+        'dates_worked': dates_worked,
+        'start_year': start_year,
+        'end_year': end_year,
+        'additional_info': [entry["description"]] if entry.get("description") else [],
+    }
+
+def _from_llm(field, value):
+    # Convert an LLM answer for one field into the shape extract_details_from_text uses
+    if field in ('name', 'email', 'phone', 'linkedin', 'github'):
+        return value if isinstance(value, str) and value != "Unknown" else None
+    if not isinstance(value, list):
+        value = [value]
+    if field == 'education':
+        return [_education_entry(entry) for entry in value if isinstance(entry, dict)] or None
+    if field == 'work_experience':
+        return [_work_experience_entry(entry) for entry in value if isinstance(entry, dict)] or None
+    return _join_items(value)
+
+def plan_llm_requests(text, sections, routed_fields):
+    """Groups the routed fields by the excerpt they are read from.
+
+    Returns a list of (fields, excerpt): one request for the header fields and one per section,
+    with the whole compacted text standing in for sections whose heading was not found.
+    """
+    headings = resume_parser.find_headings(text)
+    header = text[:headings[0][1]] if headings else text[:HEADER_CHARACTERS]
+
+    groups = {}
+    for field in routed_fields:
+        section = FIELD_SECTIONS.get(field)
+        if section is None:
+            # A resume that opens with a heading has no header, read its header fields from the whole text
+            source = 'header' if header.strip() else 'full text'
+        elif section in sections and sections[section].strip():
+            source = section
+        else:
+            source = 'full text'
+        groups.setdefault(source, []).append(field)
+
+    excerpts = {'header': header, 'full text': text}
+    requests = []
+    for source, fields in groups.items():
+        excerpt = excerpts[source] if source in excerpts else f"{source}\n{sections[source]}"
+        requests.append((fields, compact_text(excerpt)))
+    return requests
+
+async def route_resume(client, text, threshold=0.5, stream=True):
+    """Parses a resume locally and asks the LLM only for the fields scoring below threshold.
+
+    Returns (details, report): the details of extract_details_from_text with the low-confidence
+    fields replaced by the LLM's validated answers, and the field scores, routed fields and LLM
+    requests made, not counting repair requests.
+    """
+    loop = asyncio.get_running_loop()
+    details, sections = await loop.run_in_executor(_local_parse_executor, resume_parser.extract_details_and_sections, text)
+
+    scores = score_fields(details, sections)
+    routed_fields = [field for field, score in scores.items() if score < threshold]
+    requests = plan_llm_requests(text, sections, routed_fields)
+
+    results = await asyncio.gather(*(
+        extract_fields(client, excerpt, [LLM_FIELDS[field] for field in fields], stream=stream)
+        for fields, excerpt in requests
+    ), return_exceptions=True)
+
+    for (fields, _), result in zip(requests, results):
+        if isinstance(result, SchemaError):
+            # Still invalid after the repair request, keep the local values
+            continue
+        if isinstance(result, BaseException):
+            raise result
+        answer, _ = result
+        for field in fields:
+            value = _from_llm(field, answer.get(LLM_FIELDS[field]))
+            if value:
+                details[field] = value
+
+    report = {'scores': scores, 'llm_fields': routed_fields, 'llm_calls': len(requests)}
+    return details, report
+
+def main():
+    input_directory = '#text files directory'
+    output_directory = '#output directory'
+    confidence_threshold = 0.5  # Fields scoring below this are sent to the LLM
+    concurrency = 8
+    stream_responses = True  # Validate LLM answers as they stream in and abandon invalid ones early
+    api_base = None  # Set to the URL printed by llm_stub_server.py to run against the local stub
+    cache_path = 'llm-response-cache.sqlite'  # Responses reused across runs, None to disable
+
+    cache = CompletionCache(cache_path) if cache_path else None
+    client = AsyncChatClient(concurrency=concurrency, api_base=api_base, cache=cache, prompt_version=f"router-{PROMPT_TEMPLATE_VERSION}")
+
+    txt_files = [file for file in os.listdir(input_directory) if file.endswith('.txt')]
+
+    def jobs():
+        for txt_file in txt_files:
+            with open(os.path.join(input_directory, txt_file), 'r', encoding='utf-8') as f:
+                yield txt_file, client, f.read(), confidence_threshold, stream_responses
+
+    start_time = time.time()
+    totals = {'resumes': 0, 'llm_calls': 0, 'local_only': 0}
+
+    def save_result(txt_file, result, error):
+        totals['resumes'] += 1
+        if error:
+            print(f"File {totals['resumes']}/{len(txt_files)} - {txt_file} failed: {error!r}")
+            return
+        details, report = result
+        totals['llm_calls'] += report['llm_calls']
+        totals['local_only'] += not report['llm_calls']
+        print(f"File {totals['resumes']}/{len(txt_files)} - {txt_file}: {report['llm_calls']} LLM call(s) for {report['llm_fields'] or 'no fields'}")
+
+        output_file = os.path.splitext(txt_file)[0] + '_details.json'
+        with open(os.path.join(output_directory, output_file), 'w', encoding='utf-8') as f:
+            json.dump(details, f, indent=4)
+
+    asyncio.run(client.map(jobs(), route_resume, save_result))
+
+    print(f"{totals['resumes']} resumes in {time.time() - start_time:.1f} seconds, {totals['local_only']} parsed locally only, "
+          f"{totals['llm_calls']} LLM calls in total")
+    if cache:
+        cache.close()
+
+if __name__ == "__main__":
+    main()
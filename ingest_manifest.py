@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import time
+
+
+def file_fingerprint(stat_result):
+    """Returns the (mtime_ns, size) a file is recognized by, a change to either means it changed."""
+    return stat_result.st_mtime_ns, stat_result.st_size
+
+
+class IngestManifest:
+    """Durable checkpoint of the input files a run has handled, keyed by path.
+
+    Marks are kept in memory until commit writes them to an SQLite database in one
+    transaction; scans in this process see them straight away. Callers mark a file once its
+    outputs are written and commit once their sinks have made those outputs durable, so after
+    a crash only the files since the last commit are processed again: at least once, never
+    skipped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._marks = {}
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, "
+            "status TEXT NOT NULL, error TEXT, updated REAL NOT NULL)"
+        )
+
+    def _record(self, path, fingerprint):
+        # (status, updated) of the file if it was recorded with this fingerprint, uncommitted marks first
+        if path in self._marks:
+            _, mtime_ns, size, status, _, updated = self._marks[path]
+            row = (mtime_ns, size, status, updated)
+        else:
+            row = self._connection.execute("SELECT mtime_ns, size, status, updated FROM files WHERE path = ?", (path,)).fetchone()
+        if row is None or (row[0], row[1]) != tuple(fingerprint):
+            return None
+        return row[2], row[3]
+
+    def status(self, path, fingerprint):
+        """Returns 'done' or 'failed' for a file recorded with this fingerprint, None otherwise."""
+        record = self._record(path, fingerprint)
+        return record[0] if record else None
+
+    def is_pending(self, path, fingerprint, retry_failed=False, retry_after=0.0):
+        # Failures are retried with retry_failed, once they are retry_after seconds old
+        record = self._record(path, fingerprint)
+        if record is None:
+            return True
+        status, updated = record
+        return retry_failed and status == 'failed' and time.time() - updated >= retry_after
+
+    def _mark(self, path, fingerprint, status, error=None):
+        self._marks[path] = (path, fingerprint[0], fingerprint[1], status, error, time.time())
+
+    def mark_done(self, path, fingerprint):
+        self._mark(path, fingerprint, 'done')
+
+    def mark_failed(self, path, fingerprint, error):
+        # Not retried until the file changes, unless pending_files is asked to retry failures
+        self._mark(path, fingerprint, 'failed', error)
+
+    @property
+    def uncommitted(self):
+        return len(self._marks)
+
+    def commit(self):
+        if not self._marks:
+            return
+        with self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size, status, error, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                list(self._marks.values()),
+            )
+        self._marks = {}
+
+    def counts(self):
+        return dict(self._connection.execute("SELECT status, COUNT(*) FROM files GROUP BY status").fetchall())
+
+    def close(self):
+        # Uncommitted marks are dropped, their files are processed again by the next run
+        self._connection.close()
+
+
+def pending_files(directory, manifest, suffix='.pdf', settle_seconds=0.0, retry_failed=False, retry_after=0.0):
+    """Returns sorted (path, fingerprint) of the files in directory that are new or changed.
+
+    The directory is listed with os.scandir and files are compared by fingerprint only, never
+    read. Files modified in the last settle_seconds are left for the next scan, as they may
+    still be being copied in. With retry_failed, files that failed retry_after seconds ago or
+    earlier are pending too.
+    """
+    now_ns = time.time_ns()
+    pending = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.endswith(suffix) or not entry.is_file():
+                continue
+            fingerprint = file_fingerprint(entry.stat())
+            if now_ns - fingerprint[0] < settle_seconds * 1e9:
+                continue
+            if manifest.is_pending(entry.path, fingerprint, retry_failed, retry_after):
+                pending.append((entry.path, fingerprint))
+    return sorted(pending)
+
+
+def watch_directory(directory, manifest, suffix='.pdf', watch=False, poll_interval=5.0, settle_seconds=2.0, retry_failed=False,
+                    retry_after=600.0):
+    """Yields batches of pending (path, fingerprint) from directory.
+
+    Without watch this is one batch of every file not yet handled, so an interrupted run
+    resumes where it stopped. With watch the directory is scanned again after each batch and
+    every poll_interval seconds while nothing is pending, until the caller stops iterating.
+    When watching, failed files are only retried retry_after seconds after they last failed,
+    so files that always fail are not reprocessed back to back.
+    """
+    while True:
+        batch = pending_files(directory, manifest, suffix, settle_seconds if watch else 0.0, retry_failed,
+                              retry_after if watch else 0.0)
+        if batch:
+            yield batch
+        if not watch:
+            return
+        if not batch:
+            time.sleep(poll_interval)
@@ -0,0 +1,119 @@
+import contextlib
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+
+_local = threading.local()
+
+
+class DocumentStats:
+    """Wall and CPU time per stage and counters collected while processing one document.
+
+    Stage times are inclusive, so a stage that runs inside another is counted in both.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.wall_time = defaultdict(float)
+        self.cpu_time = defaultdict(float)
+        self.counters = Counter()
+
+    def record(self, stage_name, wall_time, cpu_time):
+        self.wall_time[stage_name] += wall_time
+        self.cpu_time[stage_name] += cpu_time
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'wall_time': dict(self.wall_time),
+            'cpu_time': dict(self.cpu_time),
+            'counters': dict(self.counters),
+        }
+
+
+@contextlib.contextmanager
+def track_document(name):
+    """Collects the stages and counters recorded in this thread into a new DocumentStats."""
+    stats = DocumentStats(name)
+    previous = getattr(_local, 'document', None)
+    _local.document = stats
+    try:
+        with stage('total'):
+            yield stats
+    finally:
+        _local.document = previous
+
+
+@contextlib.contextmanager
+def stage(stage_name):
+    """Times the enclosed block as stage_name of the current document, a no-op outside track_document."""
+    stats = getattr(_local, 'document', None)
+    if stats is None:
+        yield
+        return
+    wall_start, cpu_start = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        stats.record(stage_name, time.perf_counter() - wall_start, time.thread_time() - cpu_start)
+
+
+def count(counter_name, n=1):
+    """Adds n to a counter of the current document, a no-op outside track_document."""
+    stats = getattr(_local, 'document', None)
+    if stats is not None:
+        stats.counters[counter_name] += n
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class Instrumentation:
+    """Gathers the DocumentStats of a run, passes each to the registered hooks and summarizes them."""
+
+    def __init__(self, hooks=(), slowest=20):
+        self.hooks = list(hooks)
+        self.slowest = slowest
+        self.documents = []
+
+    def add_hook(self, callback):
+        """Registers callback(document_stats), called as each document finishes."""
+        self.hooks.append(callback)
+
+    def add(self, stats):
+        self.documents.append(stats)
+        for hook in self.hooks:
+            hook(stats)
+
+    def summary(self):
+        stages = {}
+        stage_names = {name for stats in self.documents for name in stats.wall_time}
+        for stage_name in sorted(stage_names):
+            wall_times = [stats.wall_time[stage_name] for stats in self.documents if stage_name in stats.wall_time]
+            stages[stage_name] = {
+                'documents': len(wall_times),
+                'wall_time_total': sum(wall_times),
+                'cpu_time_total': sum(stats.cpu_time[stage_name] for stats in self.documents if stage_name in stats.cpu_time),
+                'wall_time_p50': percentile(wall_times, 0.50),
+                'wall_time_p99': percentile(wall_times, 0.99),
+                'wall_time_max': max(wall_times),
+            }
+
+        counters = Counter()
+        for stats in self.documents:
+            counters.update(stats.counters)
+
+        slowest = sorted(self.documents, key=lambda stats: stats.wall_time.get('total', 0.0), reverse=True)
+        return {
+            'documents': len(self.documents),
+            'stages': stages,
+            'counters': dict(counters),
+            'slowest_documents': [stats.to_dict() for stats in slowest[:self.slowest]],
+        }
+
+    def write_summary(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=4)
@@ -0,0 +1,69 @@
+import hashlib
+import json
+
+from result_cache import ResultCache
+
+
+class CacheMiss(Exception):
+    """Raised by an offline CompletionCache for a prompt it has no response for."""
+
+
+def normalize_resume_text(text):
+    # Whitespace differences between extractions of the same resume should not change the key
+    return " ".join(text.split())
+
+
+def completion_cache_key(resume_text, prompt_version, model, temperature):
+    """Returns the cache key of an LLM response for a resume under a prompt template version."""
+    payload = json.dumps({
+        'resume_text': normalize_resume_text(resume_text),
+        'prompt_version': prompt_version,
+        'model': model,
+        'temperature': temperature,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class CompletionCache:
+    """Disk-backed, size-bounded cache of LLM responses in front of a completion function.
+
+    Responses are keyed by the normalized resume text, the prompt template version, the model
+    and the temperature; bump the prompt version whenever the template changes. With offline
+    set, a miss raises CacheMiss instead of calling the network.
+    """
+
+    def __init__(self, path, max_bytes=1024 ** 3, offline=False):
+        self.store = ResultCache(path, max_bytes)
+        self.offline = offline
+
+    def _lookup(self, key):
+        cached = self.store.get(key)
+        if cached is None and self.offline:
+            raise CacheMiss(f"No cached response for key {key} and the cache is offline")
+        return cached
+
+    def get_completion(self, complete, resume_text, prompt, prompt_version, model="gpt-3.5-turbo", temperature=0):
+        """Returns the cached response, or calls complete(prompt, model=..., temperature=...) and caches it."""
+        key = completion_cache_key(resume_text, prompt_version, model, temperature)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached['response']
+        response = complete(prompt, model=model, temperature=temperature)
+        self.store.put(key, {'response': response})
+        return response
+
+    async def get_completion_async(self, complete, resume_text, prompt, prompt_version, model="gpt-3.5-turbo", temperature=0):
+        """Like get_completion for a coroutine function complete(prompt)."""
+        key = completion_cache_key(resume_text, prompt_version, model, temperature)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached['response']
+        response = await complete(prompt)
+        self.store.put(key, {'response': response})
+        return response
+
+    def stats(self):
+        return self.store.stats()
+
+    def close(self):
+        self.store.close()
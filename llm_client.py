@@ -0,0 +1,196 @@
+import asyncio
+import random
+import time
+
+import openai
+
+# Errors worth retrying: rate limits, server-side failures and timeouts
+RETRYABLE_ERRORS = (
+    openai.error.RateLimitError,
+    openai.error.APIError,
+    openai.error.APIConnectionError,
+    openai.error.ServiceUnavailableError,
+    openai.error.Timeout,
+    asyncio.TimeoutError,
+)
+
+def estimate_tokens(text):
+    # Rough token count for rate limiting, about four characters per token for English text
+    return len(text) // 4 + 1
+
+
+class RateLimiter:
+    """Token buckets for requests per minute and tokens per minute, either may be None for no limit."""
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = requests_per_minute or 0
+        self._tokens = tokens_per_minute or 0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed_minutes = (now - self._updated) / 60
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(self.requests_per_minute, self._requests + elapsed_minutes * self.requests_per_minute)
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed_minutes * self.tokens_per_minute)
+
+    async def acquire(self, tokens):
+        """Waits until one request of the given number of tokens fits in both budgets."""
+        if self.tokens_per_minute:
+            # A single request larger than the whole budget would otherwise wait forever
+            tokens = min(tokens, self.tokens_per_minute)
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = 0.0
+                if self.requests_per_minute and self._requests < 1:
+                    wait = max(wait, (1 - self._requests) / self.requests_per_minute * 60)
+                if self.tokens_per_minute and self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) / self.tokens_per_minute * 60)
+                if wait == 0.0:
+                    if self.requests_per_minute:
+                        self._requests -= 1
+                    if self.tokens_per_minute:
+                        self._tokens -= tokens
+                    return
+                await asyncio.sleep(wait)
+
+
+class AsyncChatClient:
+    """Concurrent chat-completions client with rate limiting, per-call timeouts and retries.
+
+    api_base and api_key default to the openai module settings; point api_base at a local
+    server such as llm_stub_server to run without the network. With an llm_cache.CompletionCache,
+    jobs that carry their resume text are answered from the cache when possible.
+    """
+
+    def __init__(self, model="gpt-3.5-turbo", temperature=0, concurrency=8, requests_per_minute=None,
+                 tokens_per_minute=None, timeout=60, max_retries=5, backoff_base=1.0, backoff_max=60.0,
+                 expected_response_tokens=1000, api_base=None, api_key=None, cache=None, prompt_version=None):
+        self.model = model
+        self.temperature = temperature
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.expected_response_tokens = expected_response_tokens
+        self.api_base = api_base
+        self.api_key = api_key
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.cache = cache
+        self.prompt_version = prompt_version
+        self._in_flight = None
+
+    def _request_options(self):
+        options = {}
+        if self.api_base:
+            options['api_base'] = self.api_base
+        if self.api_key is not None:
+            options['api_key'] = self.api_key
+        return options
+
+    def _backoff(self, attempt):
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def complete(self, prompt, resume_text=None):
+        """Returns the response content for prompt, retrying retryable errors up to max_retries times.
+
+        resume_text is the resume the prompt was built from, used as the cache key.
+        """
+        if self.cache is not None and resume_text is not None:
+            return await self.cache.get_completion_async(
+                self._complete, resume_text, prompt, self.prompt_version, self.model, self.temperature
+            )
+        return await self._complete(prompt)
+
+    async def _complete(self, prompt):
+        async def request():
+            response = await openai.ChatCompletion.acreate(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=self.temperature,
+                **self._request_options(),
+            )
+            return response.choices[0].message["content"]
+
+        return await self._call(prompt, request)
+
+    async def complete_stream(self, prompt, new_parser):
+        """Streams the response to prompt into a parser and returns parser.close().
+
+        new_parser() is called for every attempt and returns an object with feed(text), close()
+        and a done attribute. feed sees each chunk as it arrives and may raise to abandon the
+        response mid-generation; such errors are not retried. Reading stops once done is set.
+        """
+        async def request():
+            parser = new_parser()
+            response = await openai.ChatCompletion.acreate(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=self.temperature,
+                stream=True,
+                **self._request_options(),
+            )
+            try:
+                async for chunk in response:
+                    parser.feed(chunk.choices[0].delta.get("content", ""))
+                    if parser.done:
+                        break
+            finally:
+                # Closing the stream drops the connection, so the server stops generating
+                await response.aclose()
+            return parser.close()
+
+        return await self._call(prompt, request)
+
+    async def _call(self, prompt, request):
+        # Runs await request() under the rate limits, the in-flight cap, the timeout and the retries
+        if self._in_flight is None:
+            # Caps the calls in flight, including several calls made for one job
+            self._in_flight = asyncio.Semaphore(self.concurrency)
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire(estimate_tokens(prompt) + self.expected_response_tokens)
+            try:
+                async with self._in_flight:
+                    return await asyncio.wait_for(request(), self.timeout)
+            except RETRYABLE_ERRORS:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+
+    async def map(self, jobs, func, on_result):
+        """Runs await func(*args) for each (key, *args) job, up to concurrency jobs at a time.
+
+        on_result(key, result, error) is called as each job finishes, in completion order;
+        error is None on success and the exception otherwise. jobs is consumed lazily, so it can
+        be a generator over a large corpus. An exception raised by on_result stops the batch:
+        the jobs still in flight are cancelled and awaited before it propagates.
+        """
+        jobs = iter(jobs)
+
+        async def worker():
+            for key, *args in jobs:
+                try:
+                    result, error = await func(*args), None
+                except Exception as e:
+                    result, error = None, e
+                on_result(key, result, error)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def run_batch(self, jobs, on_result):
+        """Completes (key, prompt) or (key, prompt, resume_text) jobs, see map."""
+        await self.map(jobs, self.complete, on_result)
@@ -0,0 +1,247 @@
+import asyncio
+import copy
+import json
+import re
+import time
+
+from llm_client import estimate_tokens
+from llm_stream import SchemaError, StreamingJsonParser, parse_json
+from ml_resumeparser import resume_parser
+
+# Bump whenever a prompt, json_sample, the compaction or the response validation below changes, so cached responses are not reused
+PROMPT_TEMPLATE_VERSION = "3"
+
+json_sample = {
+                "name": "",
+                "email": "",
+                "phone": "",
+                "address": "",
+                "linkedin URL": "",
+                "github URL": "",
+                "education": [
+                    {
+                    "education level": "",
+                    "specialization": "",
+                    "university name": "",
+                    "duration": "",
+                    "marks/percentage/cgpa obtained": "",
+                    "additional information": "",
+                    },
+                ],
+                "work_experience": [
+                    {
+                    "title": "",
+                    "company": "",
+                    "start_date": "",
+                    "end_date": "",
+                    "description": ""
+                    },
+                ],
+                "skills": [],
+                "certifications": [],
+                "projects": [],
+                "extracurricular_activities": [],
+                }
+
+# Fields of json_sample filled from the text before the first section heading
+HEADER_FIELDS = ["name", "email", "phone", "address", "linkedin URL", "github URL"]
+
+# Fields of json_sample filled from each section of divide_into_sections
+SECTION_FIELDS = {
+    "Education": ["education"],
+    "Work Experience": ["work_experience"],
+    "Skills": ["skills"],
+    "Projects": ["projects"],
+    "Certifications": ["certifications"],
+    "Extra": ["extracurricular_activities"],
+}
+
+# Lines that carry no information for extraction
+BOILERPLATE_PATTERN = re.compile(
+    r'^\s*(?:references(?: are)? available (?:up)?on request\.?|page \d+(?: of \d+)?|curriculum vitae|resume|cv|-+|_+)\s*$',
+    re.IGNORECASE | re.MULTILINE,
+)
+
+def count_tokens(text, model="gpt-3.5-turbo"):
+    """Counts tokens with tiktoken when it is installed, otherwise estimates them from the length."""
+    try:
+        import tiktoken
+    except ImportError:
+        return estimate_tokens(text)
+    return len(tiktoken.encoding_for_model(model).encode(text))
+
+def compact_text(text):
+    # Drop boilerplate lines and collapse runs of blank space
+    text = BOILERPLATE_PATTERN.sub('', text)
+    text = re.sub(r'[ \t]+', ' ', text)
+    text = re.sub(r' ?\n ?', '\n', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.strip()
+
+def compact_resume(text):
+    """Splits a resume into its header (contact details before the first heading) and sections.
+
+    Returns (header, {main title: section text}), both compacted, using the same section
+    headings as ML-resumeparser's divide_into_sections.
+    """
+    headings = resume_parser.find_headings(text)
+    header = text[:headings[0][1]] if headings else text
+    sections = resume_parser.divide_into_sections(text) if headings else {}
+    compacted = {title: compact_text(content) for title, content in sections.items()}
+    return compact_text(header), {title: content for title, content in compacted.items() if content}
+
+def schema_subset(fields):
+    return {field: json_sample[field] for field in fields}
+
+def build_prompt(pdf_text, schema=json_sample, schema_text=None):
+    # The schema is sent as compact JSON unless schema_text is given
+    if schema_text is None:
+        schema_text = json.dumps(schema, separators=(',', ':'))
+    return f"""Extract details from the text of resume delimited by angle brackets into a JSON. For any details that are not found, use the word 'Unknown'.
+                The JSON should have a similar structure to the keys delimited by triple backticks but it can have multiple entries of details in each section.
+                Education section must capture granular details where education level refers to the degree level for example Bachelors, Masters or PhD or such synonymous acronyms and specialisation refers to the major or course name.
+                ```{schema_text}``` <{pdf_text}>"""
+
+def plan_prompts(pdf_text, max_prompt_tokens=3000, model="gpt-3.5-turbo"):
+    """Returns the prompts for a resume as a list of (fields, resume excerpt, prompt).
+
+    The compacted resume is sent in one prompt when it fits in max_prompt_tokens, otherwise the
+    header and every section get their own prompt asking only for their fields.
+    """
+    header, sections = compact_resume(pdf_text)
+    compacted = "\n\n".join([header] + [f"{title}\n{content}" for title, content in sections.items()])
+    prompt = build_prompt(compacted)
+    if count_tokens(prompt, model) <= max_prompt_tokens or not sections:
+        return [(list(json_sample), compacted, prompt)]
+
+    plans = []
+    if header:
+        plans.append((HEADER_FIELDS, header, build_prompt(header, schema_subset(HEADER_FIELDS))))
+    for title, content in sections.items():
+        fields = SECTION_FIELDS[title]
+        excerpt = f"{title}\n{content}"
+        plans.append((fields, excerpt, build_prompt(excerpt, schema_subset(fields))))
+    return plans
+
+def parse_response(response):
+    # Models sometimes wrap the JSON in prose or a code fence
+    start, end = response.find('{'), response.rfind('}')
+    if start == -1 or end < start:
+        raise ValueError("Response does not contain a JSON object")
+    return json.loads(response[start:end + 1])
+
+def build_repair_prompt(pdf_text, fields, error):
+    # Asks again for only the fields that were missing or invalid in the previous response
+    return f"""Your previous answer was not valid JSON of the requested structure: {error}.
+                Extract details from the text of resume delimited by angle brackets into a JSON with exactly the keys delimited by triple backticks and nothing else. For any details that are not found, use the word 'Unknown'.
+                ```{json.dumps(schema_subset(fields), separators=(',', ':'))}``` <{pdf_text}>"""
+
+def merge_responses(responses):
+    """Merges the validated details of per-section prompts, a list of (fields, details), into json_sample."""
+    merged = copy.deepcopy(json_sample)
+    for field, value in merged.items():
+        merged[field] = [] if isinstance(value, list) else "Unknown"
+    for fields, details in responses:
+        for field in fields:
+            value = details.get(field)
+            if value is None:
+                continue
+            if isinstance(merged[field], list):
+                merged[field].extend(value)
+            elif value and value != "Unknown":
+                merged[field] = value
+    return merged
+
+async def complete_json(client, prompt, fields, resume_text=None, on_field=None, stream=True):
+    """Returns the response to prompt validated against the fields of json_sample.
+
+    Streamed responses are validated as they arrive and abandoned at the first invalid field,
+    raising SchemaError with the fields read so far. Only validated responses are cached.
+    """
+    schema = schema_subset(fields)
+    emitted = set()
+
+    def report_field(key, value):
+        # A retried or cached response reports the same fields again
+        if key not in emitted:
+            emitted.add(key)
+            on_field(key, value)
+
+    callback = report_field if on_field is not None else None
+
+    async def complete(prompt):
+        if stream:
+            details = await client.complete_stream(prompt, lambda: StreamingJsonParser(schema, callback))
+        else:
+            details = parse_json(await client.complete(prompt), schema, callback)
+        return json.dumps(details)
+
+    if client.cache is not None and resume_text is not None:
+        response = await client.cache.get_completion_async(
+            complete, resume_text, prompt, client.prompt_version, client.model, client.temperature
+        )
+    else:
+        response = await complete(prompt)
+    return parse_json(response, schema, callback)
+
+async def extract_fields(client, excerpt, fields, on_field=None, stream=True, max_repairs=1, prompt=None):
+    """Extracts fields of json_sample from a resume excerpt, sending repair requests for invalid fields.
+
+    Returns (details, repairs). A repair request asks only for the fields that were missing or
+    invalid, keeping the fields already validated.
+    """
+    if prompt is None:
+        prompt = build_prompt(excerpt, schema_subset(fields))
+    try:
+        return await complete_json(client, prompt, fields, f"{','.join(fields)}\n{excerpt}", on_field, stream), 0
+    except SchemaError as e:
+        details, error = e.partial, e
+
+    for repair in range(1, max_repairs + 1):
+        missing = [field for field in fields if field not in details]
+        try:
+            repaired = await complete_json(
+                client, build_repair_prompt(excerpt, missing, error), missing,
+                f"repair {repair}:{','.join(missing)}\n{excerpt}", on_field, stream,
+            )
+        except SchemaError as e:
+            details.update(e.partial)
+            error = e
+            continue
+        details.update(repaired)
+        return {field: details[field] for field in fields}, repair
+    raise error
+
+async def extract_resume(client, pdf_text, max_prompt_tokens=3000, stream=True, on_field=None, max_repairs=1):
+    """Extracts a resume with compacted prompts, running per-section prompts concurrently.
+
+    Returns (details, report) where details follows json_sample and has been validated against
+    it, and report holds the token counts of the full prompt before and of all prompts after
+    compaction, the repair requests sent and the seconds until the first field was validated.
+    on_field(field, value) is called for each field as soon as it is validated.
+    """
+    start_time = time.monotonic()
+    plans = plan_prompts(pdf_text, max_prompt_tokens, client.model)
+    report = {
+        # The prompt as it was sent before compaction: the whole text and the repr of json_sample
+        'tokens_before': count_tokens(build_prompt(pdf_text, schema_text=repr(json_sample)), client.model),
+        'tokens_after': sum(count_tokens(prompt, client.model) for _, _, prompt in plans),
+        'prompts': len(plans),
+        'first_field_seconds': None,
+    }
+
+    def report_field(field, value):
+        if report['first_field_seconds'] is None:
+            report['first_field_seconds'] = time.monotonic() - start_time
+        if on_field is not None:
+            on_field(field, value)
+
+    # The cache key covers the excerpt and the fields asked for, so each section is cached separately
+    results = await asyncio.gather(*(
+        extract_fields(client, excerpt, fields, report_field, stream, max_repairs, prompt)
+        for fields, excerpt, prompt in plans
+    ))
+    report['repairs'] = sum(repairs for _, repairs in results)
+    if len(plans) == 1:
+        return results[0][0], report
+    return merge_responses([(fields, details) for (fields, _, _), (details, _) in zip(plans, results)]), report
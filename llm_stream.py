@@ -0,0 +1,207 @@
+import json
+
+# Incremental parsing of the JSON object an LLM streams back, checked against a json_sample-style schema
+
+WHITESPACE = ' \t\r\n'
+
+
+class SchemaError(ValueError):
+    """Raised when a response is not JSON of the expected schema.
+
+    partial holds the fields that were read and validated before the error.
+    """
+
+    def __init__(self, message, partial=None):
+        super().__init__(message)
+        self.partial = dict(partial or {})
+
+
+def coerce_field(key, value, expected):
+    """Returns value as the type of expected, the field's value in the schema, or raises SchemaError.
+
+    Models answer 'Unknown' or a single string for list fields and numbers for phone numbers,
+    those are converted rather than rejected.
+    """
+    if isinstance(expected, list):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return [] if value.strip() in ('', 'Unknown') else [value]
+        if not isinstance(value, list):
+            raise SchemaError(f"{key!r} should be a list, got {type(value).__name__}")
+        if expected and isinstance(expected[0], dict):
+            # Lists of entries such as education: drop 'Unknown' placeholders, reject anything else
+            value = [item for item in value if not (isinstance(item, str) and item.strip() in ('', 'Unknown'))]
+            if not all(isinstance(item, dict) for item in value):
+                raise SchemaError(f"Entries of {key!r} should be objects")
+        return value
+    if value is None:
+        return "Unknown"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    if not isinstance(value, str):
+        raise SchemaError(f"{key!r} should be a string, got {type(value).__name__}")
+    return value
+
+
+class StreamingJsonParser:
+    """Parses a JSON object chunk by chunk, validating each top-level field as soon as it is complete.
+
+    Text before the opening brace and after the closing one (prose, code fences) is ignored.
+    Unknown keys and values of the wrong type raise SchemaError from feed, so a bad response
+    can be abandoned before it is fully generated. on_field(key, value) is called for every
+    field once it is validated; done is set when the object is closed.
+    """
+
+    def __init__(self, schema, on_field=None):
+        self.schema = schema
+        self.on_field = on_field
+        self.fields = {}
+        self.done = False
+        self._state = 'start'
+        self._token = []
+        self._key = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def _error(self, message):
+        raise SchemaError(message, self.fields)
+
+    def feed(self, text):
+        for char in text:
+            if self.done:
+                return
+            self._feed_char(char)
+
+    def _feed_char(self, char):
+        state = self._state
+        if state == 'start':
+            if char == '{':
+                self._state = 'key_or_end'
+        elif state in ('key_or_end', 'key'):
+            if char == '"':
+                self._token = []
+                self._state = 'key_string'
+            elif char == '}' and state == 'key_or_end':
+                self.done = True
+            elif char not in WHITESPACE:
+                self._error(f"Expected a key, got {char!r}")
+        elif state == 'key_string':
+            if self._escape:
+                self._escape = False
+            elif char == '\\':
+                self._escape = True
+            elif char == '"':
+                self._start_field(json.loads('"' + ''.join(self._token) + '"'))
+                return
+            self._token.append(char)
+        elif state == 'colon':
+            if char == ':':
+                self._state = 'value'
+            elif char not in WHITESPACE:
+                self._error(f"Expected ':' after {self._key!r}, got {char!r}")
+        elif state == 'value':
+            if char not in WHITESPACE:
+                self._start_value(char)
+        elif state == 'string':
+            self._token.append(char)
+            if self._escape:
+                self._escape = False
+            elif char == '\\':
+                self._escape = True
+            elif char == '"':
+                self._finish_value()
+        elif state == 'compound':
+            self._feed_compound(char)
+        elif state == 'scalar':
+            if char in WHITESPACE or char in ',}':
+                self._finish_value()
+                self._feed_char(char)
+            else:
+                self._token.append(char)
+        elif state == 'after_value':
+            if char == ',':
+                self._state = 'key'
+            elif char == '}':
+                self.done = True
+            elif char not in WHITESPACE:
+                self._error(f"Expected ',' or '}}' after {self._key!r}, got {char!r}")
+
+    def _start_field(self, key):
+        if key not in self.schema:
+            self._error(f"Unexpected key {key!r}")
+        if key in self.fields:
+            self._error(f"Duplicate key {key!r}")
+        self._key = key
+        self._state = 'colon'
+
+    def _start_value(self, char):
+        expected = self.schema[self._key]
+        self._token = [char]
+        if char == '"':
+            self._state = 'string'
+        elif char in '[{':
+            if char == '{' or not isinstance(expected, list):
+                self._error(f"{self._key!r} should be a {'list' if isinstance(expected, list) else 'string'}")
+            self._depth = 1
+            self._state = 'compound'
+        elif isinstance(expected, list) and char != 'n':
+            self._error(f"{self._key!r} should be a list")
+        else:
+            # Numbers and null, checked once complete
+            self._state = 'scalar'
+
+    def _feed_compound(self, char):
+        self._token.append(char)
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == '\\':
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+            return
+        if self._depth == 1 and char not in WHITESPACE + ',"{]':
+            # Fail on the first item of a list of entries that is neither an object nor a placeholder string
+            expected = self.schema[self._key]
+            if expected and isinstance(expected[0], dict):
+                self._error(f"Entries of {self._key!r} should be objects")
+        if char == '"':
+            self._in_string = True
+        elif char in '[{':
+            self._depth += 1
+        elif char in ']}':
+            self._depth -= 1
+            if self._depth == 0:
+                self._finish_value()
+
+    def _finish_value(self):
+        try:
+            value = json.loads(''.join(self._token))
+        except json.JSONDecodeError as e:
+            self._error(f"Invalid JSON in {self._key!r}: {e}")
+        try:
+            value = coerce_field(self._key, value, self.schema[self._key])
+        except SchemaError as e:
+            self._error(str(e))
+        self.fields[self._key] = value
+        self._state = 'after_value'
+        if self.on_field is not None:
+            self.on_field(self._key, value)
+
+    def close(self):
+        """Returns the validated object in schema order, raising SchemaError if it is incomplete."""
+        if not self.done:
+            self._error("Response ended before the JSON object was complete")
+        missing = [key for key in self.schema if key not in self.fields]
+        if missing:
+            self._error(f"Missing keys {missing}")
+        return {key: self.fields[key] for key in self.schema}
+
+
+def parse_json(text, schema, on_field=None):
+    """Parses and validates a complete response, see StreamingJsonParser."""
+    parser = StreamingJsonParser(schema, on_field)
+    parser.feed(text)
+    return parser.close()
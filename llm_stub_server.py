@@ -0,0 +1,129 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the chat-completions endpoint, for running the LLM scripts without the network
+
+DEFAULT_CONTENT = json.dumps({"name": "Unknown", "email": "Unknown", "phone": "Unknown"})
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, request, content):
+        # Server-sent events in the format of the streaming chat-completions API
+        server = self.server
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        chunks = [content[i:i + server.chunk_size] for i in range(0, len(content), server.chunk_size)]
+        try:
+            for index, text in enumerate(chunks + [None]):
+                delta = {"content": text} if text is not None else {}
+                if index == 0:
+                    delta["role"] = "assistant"
+                event = {
+                    "id": f"chatcmpl-stub-{len(server.requests)}",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request.get('model', ''),
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": None if text is not None else "stop"}],
+                }
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+                if text is not None:
+                    time.sleep(server.chunk_delay)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client abandoned the response
+            with server.lock:
+                server.streams_abandoned += 1
+
+    def do_POST(self):
+        if not self.path.endswith('/chat/completions'):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        server = self.server
+        with server.lock:
+            server.requests.append(request)
+
+        time.sleep(server.latency)
+        if random.random() < server.failure_rate:
+            self._send_json(429, {"error": {"message": "Rate limit reached (stub)", "type": "requests"}})
+            return
+
+        content = server.respond(request) if callable(server.respond) else server.respond
+        if request.get('stream'):
+            self._send_stream(request, content)
+            return
+        prompt_tokens = sum(len(message.get('content', '')) // 4 for message in request.get('messages', []))
+        self._send_json(200, {
+            "id": f"chatcmpl-stub-{len(server.requests)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get('model', ''),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4, "total_tokens": prompt_tokens + len(content) // 4},
+        })
+
+
+def start_stub_server(host='127.0.0.1', port=0, latency=0.0, failure_rate=0.0, respond=DEFAULT_CONTENT,
+                      chunk_size=8, chunk_delay=0.0):
+    """Starts the stub in a background thread and returns (server, api_base).
+
+    respond is the response content, or a callable taking the request JSON and returning it.
+    failure_rate is the fraction of requests answered with a 429 error. Every request received
+    is kept in server.requests. Requests with stream set get the content as server-sent events
+    of chunk_size characters, chunk_delay seconds apart; server.streams_abandoned counts the
+    streams the client closed early. Stop the server with server.shutdown().
+    """
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.latency = latency
+    server.failure_rate = failure_rate
+    server.respond = respond
+    server.chunk_size = chunk_size
+    server.chunk_delay = chunk_delay
+    server.requests = []
+    server.streams_abandoned = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Serve a local stub of the chat-completions endpoint")
+    arg_parser.add_argument("--port", type=int, default=8089)
+    arg_parser.add_argument("--latency", type=float, default=0.5, help="Seconds before each response")
+    arg_parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    arg_parser.add_argument("--chunk-size", type=int, default=8, help="Characters per chunk of streamed responses")
+    arg_parser.add_argument("--chunk-delay", type=float, default=0.02, help="Seconds between chunks of streamed responses")
+    args = arg_parser.parse_args()
+
+    server, api_base = start_stub_server(port=args.port, latency=args.latency, failure_rate=args.failure_rate,
+                                         chunk_size=args.chunk_size, chunk_delay=args.chunk_delay)
+    print(f"Stub chat-completions endpoint at {api_base}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
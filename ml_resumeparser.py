@@ -0,0 +1,5 @@
+import importlib
+
+# ML-resumeparser.py is not a valid module name, so it is imported by file name once here and
+# the other modules take it from this one
+resume_parser = importlib.import_module("ML-resumeparser")
@@ -0,0 +1,59 @@
+import instrumentation
+
+MODEL_NAME = "en_core_web_sm"
+
+# Pipeline components each kind of extraction can skip. In en_core_web_sm the NER component
+# has its own tok2vec, so entities do not need the shared tok2vec, tagger or parser.
+PIPELINE_PROFILES = {
+    "full": (),
+    "ner": ("tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer"),
+    "ner_pos": ("parser", "lemmatizer"),
+    "tokenizer": None,  # Every component, only the tokenizer runs
+}
+
+_models = {}
+
+def load_model(model_name=MODEL_NAME):
+    """Loads a spaCy model once per process and returns it.
+
+    Models are loaded on first use rather than at import. spacy.load only reads the installed
+    package from disk, so this never touches the network.
+    """
+    if model_name not in _models:
+        # Importing spaCy alone takes a noticeable part of a second, so defer it too
+        import spacy
+        try:
+            _models[model_name] = spacy.load(model_name)
+        except OSError as e:
+            raise OSError(
+                f"spaCy model '{model_name}' is not installed, run 'python -m spacy download {model_name}' "
+                "once on a machine with network access"
+            ) from e
+    return _models[model_name]
+
+def disabled_components(nlp, profile):
+    """Returns the components of nlp to disable for the given profile."""
+    disabled = PIPELINE_PROFILES[profile]
+    if disabled is None:
+        return list(nlp.pipe_names)
+    return [name for name in disabled if name in nlp.pipe_names]
+
+def parse(text, profile="full", model_name=MODEL_NAME, entity_counter="entities"):
+    """Runs the model over text with only the components the profile needs.
+
+    The entities found are counted under entity_counter. Parses of sections or lines of a
+    document already parsed as a whole pass their own name, so no entity is counted twice.
+    """
+    nlp = load_model(model_name)
+    doc = nlp(text, disable=disabled_components(nlp, profile))
+    instrumentation.count("nlp_calls")
+    instrumentation.count(entity_counter, len(doc.ents))
+    return doc
+
+def parse_many(texts, profile="full", model_name=MODEL_NAME, entity_counter="entities", **pipe_kwargs):
+    """Batches texts through nlp.pipe with only the components the profile needs, see parse."""
+    nlp = load_model(model_name)
+    for doc in nlp.pipe(texts, disable=disabled_components(nlp, profile), **pipe_kwargs):
+        instrumentation.count("nlp_calls")
+        instrumentation.count(entity_counter, len(doc.ents))
+        yield doc
@@ -0,0 +1,307 @@
+import argparse
+import collections
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import instrumentation
+from nlp_models import load_model, parse_many
+from resume_core import DEFAULT_REGION, extract_text_from_pdf
+from ml_resumeparser import resume_parser
+
+# Resident parser: the spaCy model stays loaded and concurrent requests share nlp.pipe batches
+
+# PyMuPDF is not thread-safe, handler threads extract PDFs one at a time
+PDF_LOCK = threading.Lock()
+
+WARMUP_TEXT = "John Smith\njohn@example.com\n\nEducation\nStanford University\n2014 - 2018\n\nWork Experience\nGoogle\nSoftware Engineer\n2018 - Present\n"
+
+
+class ParseRequest:
+    def __init__(self, text, region):
+        self.text = text
+        self.region = region
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.details = None
+        self.error = None
+        # Set when the client was already answered with a 504, the worker then skips the request
+        self.abandoned = False
+
+
+class MicroBatcher:
+    """Groups parse requests into batches for nlp.pipe in one worker thread.
+
+    A batch is sent once it has max_batch requests or its first request has waited max_wait
+    seconds. At most max_queue requests wait at once; submit raises queue.Full beyond that,
+    so callers can turn away work instead of queueing without bound.
+    """
+
+    def __init__(self, max_batch=16, max_wait=0.01, max_queue=256):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.requests = queue.Queue(max_queue)
+        self.metrics = ServiceMetrics()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def submit(self, text, region=DEFAULT_REGION):
+        request = ParseRequest(text, region)
+        self.requests.put_nowait(request)
+        return request
+
+    def _next_batch(self):
+        batch = [self.requests.get()]
+        deadline = batch[0].enqueued + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            try:
+                batch.append(self.requests.get(timeout=timeout) if timeout > 0 else self.requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            abandoned = [request for request in batch if request.abandoned]
+            if abandoned:
+                self.metrics.count('abandoned_skipped', len(abandoned))
+                for request in abandoned:
+                    request.done.set()
+                batch = [request for request in batch if not request.abandoned]
+                if not batch:
+                    continue
+            self.metrics.record_batch(len(batch), [time.perf_counter() - request.enqueued for request in batch])
+            try:
+                docs = parse_many([request.text for request in batch], "ner", batch_size=len(batch))
+                for request, doc in zip(batch, docs):
+                    with instrumentation.track_document("request") as stats:
+                        try:
+                            request.details = resume_parser.extract_details_from_text(request.text, doc, request.region)
+                        except Exception as e:
+                            request.error = f"{type(e).__name__}: {e}"
+                    self.metrics.record_stats(stats)
+                    request.done.set()
+            except Exception as e:
+                for request in batch:
+                    if not request.done.is_set():
+                        request.error = f"{type(e).__name__}: {e}"
+                        request.done.set()
+
+
+class ServiceMetrics:
+    """Request counts and recent latencies, reported by /metrics."""
+
+    def __init__(self, window=10000):
+        self.lock = threading.Lock()
+        self.counters = collections.Counter()
+        self.latencies = collections.deque(maxlen=window)
+        self.queue_waits = collections.deque(maxlen=window)
+        self.batch_sizes = collections.deque(maxlen=window)
+        self.stage_times = collections.defaultdict(lambda: collections.deque(maxlen=window))
+        self.started = time.time()
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    def record_latency(self, seconds):
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def record_batch(self, size, queue_waits):
+        with self.lock:
+            self.counters['batches'] += 1
+            self.batch_sizes.append(size)
+            self.queue_waits.extend(queue_waits)
+
+    def record_stats(self, stats):
+        with self.lock:
+            for stage_name, wall_time in stats.wall_time.items():
+                self.stage_times[stage_name].append(wall_time)
+
+    def _distribution(self, values):
+        if not values:
+            return None
+        return {
+            'p50_ms': instrumentation.percentile(values, 0.50) * 1000,
+            'p99_ms': instrumentation.percentile(values, 0.99) * 1000,
+            'max_ms': max(values) * 1000,
+        }
+
+    def snapshot(self, queue_depth):
+        with self.lock:
+            return {
+                'uptime_seconds': time.time() - self.started,
+                'counters': dict(self.counters),
+                'queue_depth': queue_depth,
+                'latency': self._distribution(list(self.latencies)),
+                'queue_wait': self._distribution(list(self.queue_waits)),
+                'mean_batch_size': sum(self.batch_sizes) / len(self.batch_sizes) if self.batch_sizes else None,
+                'stages': {name: self._distribution(list(times)) for name, times in sorted(self.stage_times.items())},
+            }
+
+
+class ParseHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=()):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        batcher = self.server.batcher
+        path = urlparse(self.path).path
+        if path == '/health':
+            self._send_json(200, {'status': 'ok', 'queue_depth': batcher.requests.qsize()})
+        elif path == '/metrics':
+            self._send_json(200, batcher.metrics.snapshot(batcher.requests.qsize()))
+        else:
+            self._send_json(404, {'error': f"Unknown path {path}"})
+
+    def _read_text(self, length):
+        # The body is a PDF, plain text, or JSON {"text": ...}
+        body = self.rfile.read(length)
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip()
+        if content_type == 'application/pdf' or body.startswith(b'%PDF'):
+            with PDF_LOCK:
+                return extract_text_from_pdf(None, body)
+        if content_type == 'application/json':
+            return json.loads(body)['text']
+        return body.decode('utf-8')
+
+    def do_POST(self):
+        batcher = self.server.batcher
+        url = urlparse(self.path)
+        if url.path != '/parse':
+            self._send_json(404, {'error': f"Unknown path {url.path}"})
+            return
+
+        start = time.perf_counter()
+        batcher.metrics.count('requests')
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if not 0 <= length <= self.server.max_body_bytes:
+            batcher.metrics.count('bad_requests')
+            # The body is left unread, so the connection cannot be reused
+            self.close_connection = True
+            self._send_json(413 if length > 0 else 400, {'error': f"Body must be at most {self.server.max_body_bytes} bytes with a Content-Length"})
+            return
+
+        # Bodies are read by at most extraction_slots handlers at once, so their memory is bounded
+        # like the parse queue; PDF extraction itself is serialized by PDF_LOCK
+        if not self.server.extraction_slots.acquire(blocking=False):
+            batcher.metrics.count('rejected')
+            self.close_connection = True
+            self._send_json(503, {'error': "Too many requests being read, retry later"}, [('Retry-After', '1')])
+            return
+        try:
+            text = self._read_text(length)
+        except Exception as e:
+            batcher.metrics.count('bad_requests')
+            self._send_json(400, {'error': f"{type(e).__name__}: {e}"})
+            return
+        finally:
+            self.server.extraction_slots.release()
+
+        region = parse_qs(url.query).get('region', [DEFAULT_REGION])[0]
+        try:
+            request = batcher.submit(text, region)
+        except queue.Full:
+            batcher.metrics.count('rejected')
+            self._send_json(503, {'error': "Too many requests waiting, retry later"}, [('Retry-After', '1')])
+            return
+
+        if not request.done.wait(self.server.request_timeout):
+            request.abandoned = True
+            batcher.metrics.count('timeouts')
+            self._send_json(504, {'error': "Parsing took too long"})
+            return
+        batcher.metrics.record_latency(time.perf_counter() - start)
+        if request.error:
+            batcher.metrics.count('errors')
+            self._send_json(500, {'error': request.error})
+            return
+        self._send_json(200, request.details)
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        request, _ = super().get_request()
+        return request, ('local', 0)
+
+
+def start_service(host='127.0.0.1', port=8090, unix_socket=None, max_batch=16, max_wait=0.01, max_queue=256, request_timeout=60,
+                  max_body_bytes=10 * 1024 * 1024, extraction_slots=None):
+    """Loads the model, starts the batch worker and serves in a background thread.
+
+    Returns the server; it listens on unix_socket when one is given, otherwise on host:port.
+    Larger bodies than max_body_bytes get a 413, and at most extraction_slots request bodies (the
+    CPU count by default) are held at once, the rest get a 503. PDFs are extracted one at a time.
+    Stop it with server.shutdown().
+    """
+    load_model()
+    # The first parse builds the section matchers and warms spaCy's caches
+    resume_parser.extract_details_from_text(WARMUP_TEXT)
+
+    batcher = MicroBatcher(max_batch, max_wait, max_queue)
+    batcher.start()
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = ThreadingUnixHTTPServer(unix_socket, ParseHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ParseHandler)
+    server.batcher = batcher
+    server.request_timeout = request_timeout
+    server.max_body_bytes = max_body_bytes
+    server.extraction_slots = threading.BoundedSemaphore(extraction_slots or os.cpu_count() or 1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Serve the resume parser over HTTP with a warm spaCy model")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8090)
+    arg_parser.add_argument("--unix-socket", help="Listen on this Unix socket instead of host and port")
+    arg_parser.add_argument("--max-batch", type=int, default=16, help="Most requests parsed in one nlp.pipe batch")
+    arg_parser.add_argument("--max-wait-ms", type=float, default=10, help="Longest a request waits for its batch to fill")
+    arg_parser.add_argument("--max-queue", type=int, default=256, help="Requests waiting before new ones get a 503")
+    arg_parser.add_argument("--request-timeout", type=float, default=60, help="Seconds before a request gets a 504")
+    arg_parser.add_argument("--max-body-mb", type=float, default=10, help="Largest request body accepted, larger ones get a 413")
+    arg_parser.add_argument("--extraction-slots", type=int, help="Request bodies read at once, defaults to the CPU count")
+    args = arg_parser.parse_args()
+
+    server = start_service(args.host, args.port, args.unix_socket, args.max_batch, args.max_wait_ms / 1000,
+                           args.max_queue, args.request_timeout, int(args.max_body_mb * 1024 * 1024), args.extraction_slots)
+    print(f"Parse service listening on {args.unix_socket or f'http://{args.host}:{args.port}'}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+
+def content_key(data, version):
+    """Returns the cache key for the bytes of an input file processed by a given pipeline version."""
+    digest = hashlib.sha256()
+    digest.update(version.encode('utf-8') + b"\0")
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Persistent cache of JSON-serializable results, keyed by content hash.
+
+    Entries are stored compressed in an SQLite database, which several worker processes can
+    read and write at once. When the stored values grow past max_bytes the least recently
+    used entries are evicted. The total size is kept up to date by triggers, and hits only
+    update their access time in memory until the next put, flush or close, so lookups never
+    take the write lock.
+    """
+
+    # Access times of hits are written back in batches of this many
+    touch_batch_size = 256
+    # Least recently used entries deleted per eviction query
+    evict_batch_size = 64
+
+    def __init__(self, path, max_bytes=1024 ** 3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._connection = None
+        self._pid = None
+        self._touched = {}
+        # Lookups made through this instance, in this process
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        # Connections cannot be shared across processes, so each worker opens its own
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+            # Rows replaced by INSERT OR REPLACE only fire the delete trigger with recursive triggers on
+            connection.execute("PRAGMA recursive_triggers = ON")
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+                # Caches created before the running total existed are summed once here
+                connection.execute(
+                    "INSERT OR IGNORE INTO meta (name, value) SELECT 'total_size', COALESCE(SUM(size), 0) FROM entries"
+                )
+                connection.execute(
+                    "CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN "
+                    "UPDATE meta SET value = value + new.size WHERE name = 'total_size'; END"
+                )
+                connection.execute(
+                    "CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN "
+                    "UPDATE meta SET value = value - old.size WHERE name = 'total_size'; END"
+                )
+                connection.execute(
+                    "CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN "
+                    "UPDATE meta SET value = value + new.size - old.size WHERE name = 'total_size'; END"
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, key):
+        connection = self._connect()
+        row = connection.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched[key] = time.time()
+        if len(self._touched) >= self.touch_batch_size:
+            self.flush()
+        return json.loads(zlib.decompress(row[0]).decode('utf-8'))
+
+    def put(self, key, value):
+        blob = zlib.compress(json.dumps(value).encode('utf-8'))
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time()),
+            )
+            self._write_touched(connection)
+            self._evict(connection)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _write_touched(self, connection):
+        if self._touched:
+            connection.executemany(
+                "UPDATE entries SET last_access = ? WHERE key = ?",
+                [(last_access, key) for key, last_access in self._touched.items()],
+            )
+            self._touched = {}
+
+    def flush(self):
+        """Writes the access times of recent hits, so eviction sees them."""
+        if not self._touched:
+            return
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._write_touched(connection)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _total_size(self, connection):
+        return connection.execute("SELECT value FROM meta WHERE name = 'total_size'").fetchone()[0]
+
+    def _evict(self, connection):
+        # The oldest entries are deleted a batch at a time through the last_access index
+        while self._total_size(connection) > self.max_bytes:
+            deleted = connection.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY last_access LIMIT ?)",
+                (self.evict_batch_size,),
+            ).rowcount
+            if not deleted:
+                break
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def close(self):
+        if self._connection is not None and self._pid == os.getpid():
+            self.flush()
+            self._connection.close()
+        self._connection = None
+
+    def __getstate__(self):
+        # Only the location and limits travel to worker processes, never the open connection
+        return {'path': self.path, 'max_bytes': self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'], state['max_bytes'])
@@ -0,0 +1,226 @@
+import collections
+import fitz  # PyMuPDF
+import multiprocessing
+import os
+import re
+import phonenumbers
+
+import instrumentation
+
+# Text extraction and contact extractors shared by ML-resumeparser.py and dataprep.py
+
+# Special characters replaced or removed in extracted text, applied in a single translate pass
+NORMALIZATION_TABLE = str.maketrans({
+    "\u2022": " ",   # Bullet
+    "\u25cf": " ",   # Black Circle
+    "\u25cb": " ",   # White Circle
+    "\u2019": "'",   # Apostrophe
+    "\u2013": "-",   # Hyphen or Dash
+    "\ufffd": None,  # Unknown special character
+})
+
+# "text" is PyMuPDF's plain text order, "blocks" orders text blocks column by column
+PDF_LAYOUTS = ("text", "blocks")
+
+# Blocks whose tops are this many points apart or less are on the same row
+ROW_TOLERANCE = 3
+
+# Page worker processes are only started for PDFs with at least this many pages, for shorter
+# ones starting a pool and reopening the document costs more than reading the pages
+PAGE_WORKERS_MIN_PAGES = 8
+
+def normalize_text(text):
+    # Handle and remove special characters
+    return text.translate(NORMALIZATION_TABLE)
+
+def _open_pdf(pdf_path, pdf_bytes=None):
+    if pdf_bytes is not None:
+        return fitz.open(stream=pdf_bytes, filetype="pdf")
+    return fitz.open(pdf_path)
+
+def _order_band(left, right):
+    # When every right-hand block starts level with a left-hand one, they are right-aligned parts
+    # of single-column rows, such as the dates of a job title, and each follows its row
+    rows = [[block] for block in left]
+    for block in right:
+        row = next((row for row in rows if abs(row[0][1] - block[1]) <= ROW_TOLERANCE), None)
+        if row is None:
+            # A block of its own: the band really has two columns
+            return left + right
+        row.append(block)
+    return [block for row in rows for block in row]
+
+def _column_order(blocks, page_width):
+    # Blocks left of the middle are read before the blocks right of it, a block spanning
+    # both columns (a heading or a full-width paragraph) closes the columns above it
+    middle = page_width / 2
+    ordered, left, right = [], [], []
+    for block in sorted(blocks, key=lambda block: (block[1], block[0])):
+        x0, x1 = block[0], block[2]
+        if x1 <= middle:
+            left.append(block)
+        elif x0 >= middle:
+            right.append(block)
+        else:
+            ordered += _order_band(left, right) + [block]
+            left, right = [], []
+    return ordered + _order_band(left, right)
+
+def page_text(page, layout="text"):
+    """Returns the raw text of a fitz page in the given layout, see PDF_LAYOUTS."""
+    if layout == "text":
+        return page.get_text()
+    if layout != "blocks":
+        raise ValueError(f"Unknown layout {layout!r}, expected one of {PDF_LAYOUTS}")
+    # Blocks are (x0, y0, x1, y1, text, block number, block type), type 1 is an image
+    blocks = [block for block in page.get_text("blocks") if block[6] == 0]
+    return "".join(block[4] if block[4].endswith("\n") else block[4] + "\n" for block in _column_order(blocks, page.rect.width))
+
+# The document each page worker process reads its pages from
+_worker_document = None
+
+def _open_worker_document(pdf_path, pdf_bytes):
+    global _worker_document
+    _worker_document = _open_pdf(pdf_path, pdf_bytes)
+
+def _worker_page_text(args):
+    page_number, layout = args
+    return normalize_text(page_text(_worker_document[page_number], layout))
+
+def iter_pdf_pages(pdf_path, pdf_bytes=None, layout="text", max_pages=None, workers=1):
+    """Yields the normalized text of each page of a PDF, in order, as soon as it is read.
+
+    max_pages stops after the first pages of very long PDFs. With workers > 1, PDFs of at
+    least PAGE_WORKERS_MIN_PAGES pages are read by that many processes, each opening its own
+    copy of the document, which read ahead while the caller works on earlier pages; this
+    cannot be used from inside the worker processes of another pool.
+    """
+    with instrumentation.stage("pdf_open"):
+        pdf_document = _open_pdf(pdf_path, pdf_bytes)
+    try:
+        page_count = len(pdf_document) if max_pages is None else min(max_pages, len(pdf_document))
+        if workers > 1 and page_count >= PAGE_WORKERS_MIN_PAGES:
+            with multiprocessing.Pool(min(workers, page_count), initializer=_open_worker_document, initargs=(pdf_path, pdf_bytes)) as pool:
+                for text in pool.imap(_worker_page_text, ((page_number, layout) for page_number in range(page_count))):
+                    instrumentation.count("pages")
+                    instrumentation.count("characters", len(text))
+                    yield text
+            return
+
+        for page_number in range(page_count):
+            with instrumentation.stage("page_text"):
+                text = page_text(pdf_document[page_number], layout)
+            with instrumentation.stage("normalization"):
+                text = normalize_text(text)
+            instrumentation.count("pages")
+            instrumentation.count("characters", len(text))
+            yield text
+    finally:
+        pdf_document.close()
+
+def extract_text_from_pdf(pdf_path, pdf_bytes=None, layout="text", max_pages=None, workers=1):
+    """Returns the normalized text of a PDF, read straight from the fitz document in memory."""
+    return "".join(iter_pdf_pages(pdf_path, pdf_bytes, layout, max_pages, workers))
+
+def pdf_to_text(pdf_path, output_directory):
+    full_text = extract_text_from_pdf(pdf_path)
+
+    # Generate the output .txt file name based on the PDF file name
+    txt_file_name = os.path.splitext(os.path.basename(pdf_path))[0] + ".txt"
+
+    # Save the extracted text to a new .txt file in the specified output directory
+    txt_file_path = os.path.join(output_directory, txt_file_name)
+    with open(txt_file_path, 'w', encoding='utf-8') as f:
+        f.write(full_text)
+        print(f"Writing txt file for {txt_file_name}")
+
+    return txt_file_path
+
+
+def extract_name(doc):
+    for ent in doc.ents:
+        if ent.label_ == "PERSON":
+            return ent.text.strip()
+    return "Unknown"  # Return Unknown if no name is found
+
+# Contact patterns, compiled once at import
+EMAIL_PATTERN = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+LINKEDIN_PATTERN = r'https?://(?:www\.)?linkedin\.com/[\w\-/]+'  # Regular expression pattern to extract LinkedIn URLs
+GITHUB_PATTERN = r'https?://(?:www\.)?github\.com/[\w\-]+'  # Regular expression pattern to extract GitHub URLs
+# Digit-dense runs on a single line that could be phone numbers, only these are validated with phonenumbers
+PHONE_CANDIDATE_PATTERN = r'(?<!\w)\+?\(?\d[\d \t().\-/]{5,}\d(?![\w@])'
+
+email_regex = re.compile(EMAIL_PATTERN)
+linkedin_regex = re.compile(LINKEDIN_PATTERN)
+github_regex = re.compile(GITHUB_PATTERN)
+contact_regex = re.compile(
+    rf'(?P<email>{EMAIL_PATTERN})|(?P<linkedin>{LINKEDIN_PATTERN})|(?P<github>{GITHUB_PATTERN})|(?P<phone>{PHONE_CANDIDATE_PATTERN})'
+)
+
+DEFAULT_REGION = "US"
+MIN_PHONE_DIGITS = 7
+PHONE_WINDOW_CONTEXT = 4  # Characters either side of a candidate handed to the phone matcher
+
+ContactMatch = collections.namedtuple('ContactMatch', ['kind', 'value', 'start', 'end'])
+
+def _match_phones(text, start, end, region):
+    # Validate one candidate with PhoneNumberMatcher on a small window instead of the whole text
+    window_start = max(0, start - PHONE_WINDOW_CONTEXT)
+    window = text[window_start:end + PHONE_WINDOW_CONTEXT]
+    for match in phonenumbers.PhoneNumberMatcher(window, region):
+        phone_number = phonenumbers.format_number(match.number, phonenumbers.PhoneNumberFormat.E164)
+        if phone_number:
+            yield ContactMatch('phone', phone_number, window_start + match.start, window_start + match.end)
+
+def extract_contacts(text, region=DEFAULT_REGION):
+    """Finds every email, LinkedIn URL, GitHub URL and phone number in text in one scan.
+
+    Returns a list of ContactMatch(kind, value, start, end) sorted by start offset. Phone numbers
+    are formatted as E164, with numbers written without a country code read as region numbers.
+    """
+    contacts = []
+    last_phone_end = 0
+    for match in contact_regex.finditer(text):
+        kind = match.lastgroup
+        if kind != 'phone':
+            contacts.append(ContactMatch(kind, match.group(), match.start(), match.end()))
+            continue
+        candidate = match.group()
+        if sum(char.isdigit() for char in candidate) < MIN_PHONE_DIGITS:
+            continue
+        for phone in _match_phones(text, match.start(), match.end(), region):
+            # Windows of neighbouring candidates can overlap, keep each number once
+            if phone.start >= last_phone_end:
+                contacts.append(phone)
+                last_phone_end = phone.end
+    contacts.sort(key=lambda contact: contact.start)
+    return contacts
+
+def first_contacts(contacts):
+    """Returns {kind: value} with the first match of each kind, "" for kinds that were not found."""
+    first = {'email': "", 'linkedin': "", 'github': "", 'phone': ""}
+    for contact in contacts:
+        if not first[contact.kind]:
+            first[contact.kind] = contact.value
+    return first
+
+def extract_email(text):
+    email_match = email_regex.search(text)
+    if email_match:
+        return email_match.group()
+    return ""
+
+def extract_linkedin_url(text):
+    match = linkedin_regex.search(text)
+    return match.group(0) if match else ""
+
+def extract_github_url(text):
+    match = github_regex.search(text)
+    return match.group(0) if match else ""
+
+def extract_phone_number(text, region=DEFAULT_REGION):
+    for match in phonenumbers.PhoneNumberMatcher(text, region):
+        phone_number = phonenumbers.format_number(match.number, phonenumbers.PhoneNumberFormat.E164)
+        if phone_number:
+            return phone_number
+    return ""
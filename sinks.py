@@ -0,0 +1,247 @@
+import contextlib
+import json
+import os
+import shutil
+import time
+
+
+@contextlib.contextmanager
+def atomic_open(path, mode='w', **kwargs):
+    """Opens a temporary file next to path and moves it over path once the block succeeds.
+
+    Readers see the old file or the complete new one, never a partial write, and writing the
+    same output again after a crash simply replaces it.
+    """
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        with open(tmp_path, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+
+class TextFileSink:
+    """Writes the text of each resume to <output_directory>/<name>.txt."""
+
+    def __init__(self, output_directory):
+        self.output_directory = output_directory
+
+    def write(self, name, text):
+        txt_file_name = name + ".txt"
+        with atomic_open(os.path.join(self.output_directory, txt_file_name), 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"Writing txt file for {txt_file_name}")
+
+    def flush(self):
+        # Every file is complete once write returns
+        return True
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CorpusSink:
+    """Appends the text of every resume to one concatenated corpus file.
+
+    The file is opened once and written through a large buffer instead of being
+    reopened in append mode for every resume. The corpus has no per-resume key, so runs
+    that resume from a checkpoint rebuild it with rebuild_corpus instead.
+    """
+
+    def __init__(self, path, buffer_size=1024 * 1024):
+        self.path = path
+        self._file = open(path, 'w', encoding='utf-8', buffering=buffer_size)
+
+    def write(self, name, text):
+        self._file.write(text + "\n")
+
+    def flush(self):
+        # Make everything written so far durable, before a checkpoint records it as done
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return True
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def rebuild_corpus(txt_directory, path):
+    """Rewrites the corpus file at path from the .txt files of a TextFileSink directory.
+
+    Each resume's latest text appears once, in file name order, as CorpusSink would write it.
+    """
+    with atomic_open(path, 'w', encoding='utf-8', newline='') as corpus:
+        for txt_file in sorted(file for file in os.listdir(txt_directory) if file.endswith('.txt')):
+            with open(os.path.join(txt_directory, txt_file), 'r', encoding='utf-8', newline='') as f:
+                shutil.copyfileobj(f, corpus)
+            corpus.write("\n")
+
+
+class JsonlSink:
+    """Streams the details of every resume into one JSON Lines file.
+
+    Each line is {"file": name, **details}; nested education and work experience lists keep
+    their structure. The file is replaced unless append is set, for runs that resume from a
+    checkpoint.
+    """
+
+    def __init__(self, path, buffer_size=1024 * 1024, append=False):
+        self.path = path
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8', buffering=buffer_size)
+
+    def write(self, name, details):
+        self._file.write(json.dumps({'file': name, **details}, ensure_ascii=False) + "\n")
+
+    def flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return True
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def resume_details_schema(pa):
+    """Returns the pyarrow schema of a row written by ParquetSink."""
+    string_list = pa.list_(pa.string())
+    education = pa.struct([
+        ('university_name', pa.string()),
+        ('course_name', pa.string()),
+        ('dates_attended', pa.string()),
+        ('start_year', pa.int32()),
+        ('end_year', pa.int32()),
+        ('marks_or_percentage', pa.string()),
+        ('additional_info', string_list),
+    ])
+    work_experience = pa.struct([
+        ('company_name', pa.string()),
+        ('job_title', pa.string()),
+        ('dates_worked', pa.string()),
+        ('start_year', pa.int32()),
+        ('end_year', pa.int32()),
+        ('additional_info', string_list),
+    ])
+    return pa.schema([
+        ('file', pa.string()),
+        ('name', pa.string()),
+        ('email', pa.string()),
+        ('phone', pa.string()),
+        ('education', pa.list_(education)),
+        ('work_experience', pa.list_(work_experience)),
+        ('linkedin', pa.string()),
+        ('github', pa.string()),
+        ('projects', pa.string()),
+        ('certifications', pa.string()),
+        ('extra', pa.string()),
+        ('skills', pa.string()),
+    ])
+
+
+class ParquetSink:
+    """Writes the details of every resume to a Parquet dataset directory.
+
+    Rows are buffered and written one row group at a time; a new part file is started every
+    rows_per_file rows. A part file is only readable once closed: flush closes the current one
+    once its oldest row is file_seconds old, so frequent checkpoints do not leave a trail of
+    tiny files. The part files of earlier runs are deleted unless append is set, for runs that
+    resume from a checkpoint; appended part files never overwrite them. Requires pyarrow.
+    """
+
+    def __init__(self, directory, row_group_size=10000, rows_per_file=1000000, file_seconds=600, append=False):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("ParquetSink requires pyarrow, install it with 'pip install pyarrow'") from e
+
+        self._pa = pa
+        self._pq = pq
+        self.schema = resume_details_schema(pa)
+        self.directory = directory
+        self.row_group_size = row_group_size
+        self.rows_per_file = rows_per_file
+        self.file_seconds = file_seconds
+        os.makedirs(directory, exist_ok=True)
+
+        existing_parts = [file for file in os.listdir(directory) if file.startswith('part-') and file.endswith('.parquet')]
+        if not append:
+            for part_file in existing_parts:
+                os.remove(os.path.join(directory, part_file))
+            existing_parts = []
+        self._part_number = len(existing_parts)
+        self._writer = None
+        self._rows_in_file = 0
+        self._rows = []
+        # time.monotonic() when the oldest row not yet in a closed part file was written
+        self._oldest_open_row = None
+
+    def write(self, name, details):
+        if self._oldest_open_row is None:
+            self._oldest_open_row = time.monotonic()
+        self._rows.append({'file': name, **details})
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._rows:
+            return
+        if self._writer is None:
+            while True:
+                part_path = os.path.join(self.directory, f"part-{self._part_number:05d}.parquet")
+                self._part_number += 1
+                if not os.path.exists(part_path):
+                    break
+            self._writer = self._pq.ParquetWriter(part_path, self.schema)
+
+        self._writer.write_table(self._pa.Table.from_pylist(self._rows, schema=self.schema))
+        self._rows_in_file += len(self._rows)
+        self._rows = []
+
+        if self._rows_in_file >= self.rows_per_file:
+            self._close_file()
+
+    def _close_file(self):
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._rows_in_file = 0
+        self._oldest_open_row = None
+
+    def flush(self):
+        """Returns whether every row written so far is in a closed part file."""
+        if self._oldest_open_row is not None and time.monotonic() - self._oldest_open_row >= self.file_seconds:
+            self._close_file()
+        return self._oldest_open_row is None
+
+    def close(self):
+        self._close_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
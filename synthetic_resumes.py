@@ -0,0 +1,162 @@
+import argparse
+import os
+import random
+
+FIRST_NAMES = ["James", "Priya", "Wei", "Olivia", "Mohammed", "Sofia", "Arjun", "Emma", "Kwame", "Hannah", "Luis", "Aisha"]
+LAST_NAMES = ["Smith", "Patel", "Chen", "Johnson", "Khan", "Garcia", "Sharma", "Brown", "Mensah", "Muller", "Rossi", "Okafor"]
+UNIVERSITIES = ["Imperial College", "Stanford University", "University of Manchester", "Indian Institute", "Trinity College", "Massachusetts Institute", "National University"]
+COURSES = ["BSc Computer Science", "B.Tech Electrical Engineering", "MSc Data Science", "Masters in Business Analytics", "PhD Machine Learning", "BA Economics"]
+MARKS = ["3.8/4", "8.9/10", "82%", "First Class", "Pass with Distinction"]
+COMPANIES = ["Google", "Amazon Web Services", "Deloitte", "Barclays", "Accenture", "Infosys", "Microsoft", "Tata Consultancy Services", "Siemens", "Unilever"]
+TITLES = ["Software Engineer", "Senior Data Analyst", "Product Manager", "Lead Developer", "Associate Consultant", "Research Assistant", "Principal Engineer"]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+DETAILS = [
+    "Built data pipelines processing 2TB of logs per day",
+    "Led a team of 5 engineers to migrate services to Kubernetes",
+    "Reduced reporting latency by 40% using Spark",
+    "Designed REST APIs consumed by 3 internal teams",
+    "Mentored junior developers and ran code reviews",
+    "Automated regression testing with pytest and Jenkins",
+    "Partnered with {company} on a joint analytics platform",
+    "Presented results to the board in {month} {year}",
+]
+SKILLS = ["Python", "SQL", "Java", "Kubernetes", "AWS", "Spark", "TensorFlow", "React", "Docker", "Tableau", "Excel", "Go"]
+PROJECTS = ["Resume parser using spaCy", "Real-time fraud detection service", "Mobile app for campus events", "Recommendation engine for an online store"]
+CERTIFICATIONS = ["AWS Certified Solutions Architect", "Google Professional Data Engineer", "PMP", "Certified Kubernetes Administrator"]
+EXTRAS = ["Captain of the university football team", "Volunteer tutor for underprivileged students", "Hobbies: chess, hiking and photography"]
+
+# Different ways resumes write the same heading
+HEADINGS = {
+    "Education": ["EDUCATION", "Education", "Academic Qualifications", "Education:"],
+    "Work Experience": ["WORK EXPERIENCE", "Work Experience", "Professional Experience", "Employment History"],
+    "Skills": ["SKILLS", "Technical Skills", "Key Skills:"],
+    "Projects": ["PROJECTS", "Key Projects"],
+    "Certifications": ["CERTIFICATIONS", "Certifications"],
+    "Extra": ["Interests and Hobbies", "Extracurricular", "Leadership"],
+}
+
+# Number of entries per section for each resume length
+LENGTHS = {
+    "short": {"jobs": (1, 2), "details": (1, 3), "education": (1, 1), "projects": (0, 1)},
+    "medium": {"jobs": (2, 4), "details": (2, 4), "education": (1, 2), "projects": (1, 3)},
+    "long": {"jobs": (5, 10), "details": (4, 8), "education": (2, 3), "projects": (3, 6)},
+}
+
+def _date_range(rng):
+    start_year = rng.randint(2000, 2021)
+    style = rng.randrange(3)
+    end = "Present" if rng.random() < 0.3 else str(start_year + rng.randint(1, 4))
+    if style == 0:
+        return f"{start_year} - {end}"
+    if style == 1:
+        return f"{rng.choice(MONTHS)} {start_year} - {end}"
+    return f"{rng.randint(1, 12):02d}/{start_year} - {end}"
+
+def _detail(rng):
+    return rng.choice(DETAILS).format(company=rng.choice(COMPANIES), month=rng.choice(MONTHS), year=rng.randint(2010, 2023))
+
+def generate_resume(rng, length="medium", entity_density=0.5):
+    """Returns the text of one synthetic resume.
+
+    length is one of LENGTHS; entity_density (0 to 1) controls how many optional contact details,
+    dates and organization mentions are added. Section order and heading wording vary per resume.
+    """
+    sizes = LENGTHS[length]
+    first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    handle = f"{first_name.lower()}{last_name.lower()}{rng.randint(1, 99)}"
+
+    lines = [f"{first_name} {last_name}", f"{handle}@example.com | +1 {rng.randint(200, 999)} {rng.randint(200, 999)} {rng.randint(1000, 9999)}"]
+    if rng.random() < entity_density:
+        lines.append(f"https://www.linkedin.com/in/{handle}")
+    if rng.random() < entity_density:
+        lines.append(f"https://github.com/{handle}")
+    lines.append("")
+
+    sections = {}
+
+    education = []
+    for _ in range(rng.randint(*sizes["education"])):
+        education.append(rng.choice(UNIVERSITIES))
+        education.append(rng.choice(COURSES))
+        education.append(_date_range(rng))
+        if rng.random() < entity_density:
+            education.append(rng.choice(MARKS))
+    sections["Education"] = education
+
+    work_experience = []
+    for _ in range(rng.randint(*sizes["jobs"])):
+        work_experience.append(rng.choice(COMPANIES))
+        work_experience.append(rng.choice(TITLES))
+        work_experience.append(_date_range(rng))
+        for _ in range(rng.randint(*sizes["details"])):
+            detail = _detail(rng)
+            if rng.random() < entity_density:
+                detail += f" with {rng.choice(COMPANIES)} since {rng.randint(2010, 2023)}"
+            work_experience.append("- " + detail)
+        work_experience.append("")
+    sections["Work Experience"] = work_experience
+
+    sections["Skills"] = [", ".join(rng.sample(SKILLS, rng.randint(4, len(SKILLS))))]
+    num_projects = rng.randint(*sizes["projects"])
+    if num_projects:
+        sections["Projects"] = ["- " + project for project in rng.sample(PROJECTS, min(num_projects, len(PROJECTS)))]
+    if rng.random() < entity_density:
+        sections["Certifications"] = rng.sample(CERTIFICATIONS, rng.randint(1, 2))
+    if rng.random() < 0.5:
+        sections["Extra"] = rng.sample(EXTRAS, rng.randint(1, 2))
+
+    titles = list(sections)
+    rng.shuffle(titles)
+    for title in titles:
+        lines.append(rng.choice(HEADINGS[title]))
+        lines.extend(sections[title])
+        lines.append("")
+
+    return "\n".join(lines)
+
+def render_pdf(text, pdf_path, font_size=10, margin=50):
+    """Renders text to a PDF with PyMuPDF, starting a new page whenever one is full."""
+    import fitz  # PyMuPDF
+
+    line_height = font_size * 1.3
+    pdf_document = fitz.open()
+    page = None
+    y = 0
+    for line in text.split("\n"):
+        if page is None or y > page.rect.height - margin:
+            page = pdf_document.new_page()
+            y = margin + font_size
+        page.insert_text((margin, y), line, fontsize=font_size)
+        y += line_height
+    pdf_document.save(pdf_path)
+    pdf_document.close()
+
+def generate_corpus(output_directory, count, seed=0, pdf=True):
+    """Writes count synthetic resumes as .txt (and .pdf) files and returns the list of base paths."""
+    rng = random.Random(seed)
+    os.makedirs(output_directory, exist_ok=True)
+    base_paths = []
+    for i in range(count):
+        length = rng.choice(list(LENGTHS))
+        text = generate_resume(rng, length, entity_density=rng.random())
+        base_path = os.path.join(output_directory, f"resume_{i:05d}_{length}")
+        with open(base_path + ".txt", 'w', encoding='utf-8') as f:
+            f.write(text)
+        if pdf:
+            render_pdf(text, base_path + ".pdf")
+        base_paths.append(base_path)
+    return base_paths
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Generate a synthetic resume corpus")
+    arg_parser.add_argument("output_directory")
+    arg_parser.add_argument("--count", type=int, default=100)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--no-pdf", action="store_true", help="Only write .txt files")
+    args = arg_parser.parse_args()
+
+    generate_corpus(args.output_directory, args.count, args.seed, pdf=not args.no_pdf)
+    print(f"Wrote {args.count} resumes to {args.output_directory}")
+
+if __name__ == "__main__":
+    main()